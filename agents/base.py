@@ -149,12 +149,13 @@ class BaseAgent:
             agent=self.agent_model
         )
         
-        # Extract reasoning
-        reasoning = None
-        for part in result.all_messages()[-1].parts:
-            if isinstance(part, ThinkingPart):
-                reasoning = part.content
-                break
+        # Extract reasoning (single all_messages() call, short-circuit scan)
+        all_messages = result.all_messages()
+        reasoning = next(
+            (part.content for part in all_messages[-1].parts
+             if isinstance(part, ThinkingPart)),
+            None
+        )
         
         # Update memory
         MemoryService.update_conversation_memory(conversation, result)
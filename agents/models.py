@@ -35,9 +35,14 @@ class Conversation(models.Model):
         return f"User {username} conversation with {self.agent.name}. Conversation ID: {self.id}"
     
     def mark_for_summarization(self):
-        # Mark conversation as needing summary regeneration
+        # Mark conversation as needing summary regeneration.
+        # Single atomic UPDATE - no read-modify-write race with other
+        # concurrent messages in the same conversation.
+        Conversation.objects.filter(id=self.id).update(
+            summary_needs_regeneration=True,
+            updated_at=models.functions.Now()
+        )
         self.summary_needs_regeneration = True
-        self.save(update_fields=['summary_needs_regeneration', 'updated_at'])
     
     def update_summary(self, new_summary: str, embedding=None):
         # Update summary and reset regeneration flag
@@ -1,6 +1,22 @@
 import requests
 import os
 from pgvector.django import CosineDistance
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Module-level session so TCP connections to Ollama are kept alive and
+# reused across EmbeddingService instances. The adapter sizes the pool
+# for concurrent callers and retries transient upstream errors.
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=100,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+)
+_session.mount('http://', _adapter)
+_session.mount('https://', _adapter)
+
 
 class EmbeddingService:
     def __init__(self, base_url: str = None):
@@ -8,7 +24,7 @@ class EmbeddingService:
     
     def generate_embedding(self, text: str, model: str = "nomic-embed-text:v1.5") -> list[float]:
         try:
-            response = requests.post(
+            response = _session.post(
                 f"{self.base_url}/api/embeddings",
                 json={
                     "model": model,
@@ -22,6 +38,27 @@ class EmbeddingService:
             print(f"Error generating embedding: {e}")
             raise
 
+    def generate_embeddings(self, texts: list[str], model: str = "nomic-embed-text:v1.5") -> list[list[float]]:
+        """
+        Embed multiple texts in one request via Ollama's /api/embed endpoint.
+        One forward pass amortizes the HTTP and model-load overhead that
+        per-text calls pay N times.
+        """
+        try:
+            response = _session.post(
+                f"{self.base_url}/api/embed",
+                json={
+                    "model": model,
+                    "input": texts
+                },
+                timeout=60
+            )
+            response.raise_for_status()
+            return response.json()["embeddings"]
+        except requests.exceptions.RequestException as e:
+            print(f"Error generating embeddings: {e}")
+            raise
+
     def search_similar_messages(self, query_embedding: list[float], user=None, agent=None, limit: int = 5):
         from ..models import Message
         
@@ -1,3 +1,5 @@
+from functools import lru_cache
+import httpx
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.openai import OpenAIChatModel, OpenAIModelProfile
 from pydantic_ai.providers.ollama import OllamaProvider
@@ -16,6 +18,15 @@ MODELS_WITHOUT_TOOL_SUPPORT = [
 ]
 
 
+# Shared HTTP client for all Ollama-backed models. Every LLMService used
+# to get its own client, paying TCP setup per instance; one pooled
+# client keeps connections alive across services and requests.
+_OLLAMA_HTTP_CLIENT = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    timeout=httpx.Timeout(300.0, connect=5.0),
+)
+
+
 class LLMService:
     """Base service for LLM interactions using pydantic-ai"""
     
@@ -48,7 +59,7 @@ class LLMService:
         
         self.ollama_model = OpenAIChatModel(
             model_name=model_name,
-            provider=OllamaProvider(base_url=base_url),
+            provider=OllamaProvider(base_url=base_url, http_client=_OLLAMA_HTTP_CLIENT),
             profile=profile,
         )
         
@@ -233,4 +244,28 @@ Do NOT call any more tools."""
             message,
             message_history=messages,
             deps=deps,
-        )
\ No newline at end of file
+        )
+
+@lru_cache(maxsize=32)
+def get_llm_service(
+    model_name: str,
+    base_url: str,
+    system_prompt: str = "",
+    max_tokens: int = 32768) -> LLMService:
+    """
+    Return a cached LLMService for tool-less callers.
+
+    Constructing an LLMService builds a pydantic-ai Agent and its HTTP
+    client every time; callers that use a fixed model/prompt combination
+    (form extraction, Operator routing) should reuse one instance so the
+    underlying connection pool survives across requests.
+
+    Services with tools or history processors can't be cached here
+    (the arguments aren't hashable) - construct those directly.
+    """
+    return LLMService(
+        model_name=model_name,
+        base_url=base_url,
+        system_prompt=system_prompt,
+        max_tokens=max_tokens,
+    )
@@ -3,8 +3,98 @@ Generic form handler for collecting structured data through conversational flows
 Handles state management, validation, and completion callbacks.
 """
 import os
+import json
+import importlib
+import threading
 from typing import Dict, Any, Optional, Tuple, List, Callable
-from agents.services.llm_service import LLMService
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import F, Func, JSONField, TextField, Value
+from rapidfuzz import fuzz, process
+from ollama import Client
+from agents.services.llm_service import get_llm_service
+
+
+# Top-level short_term_memory keys owned by the form flow
+_FORM_MEMORY_KEYS = ['form_state', 'form_active', 'form_config']
+
+# Static instruction prefixes for answer extraction, built once at
+# import. Keeping the prefix byte-identical across turns (dynamic parts
+# only in the suffix) lets the llama.cpp prompt cache reuse the KV
+# entries for the instruction header.
+_EXTRACT_PREFIX_VALID_VALUES = """You are extracting structured data from user responses.
+
+INSTRUCTIONS:
+1. Read the user's response carefully
+2. Determine which valid option best matches their intent
+3. Respond with ONLY the exact option word from the valid list below
+4. Common variations to handle:
+   - "lightly active" → "light"
+   - "moderately active" → "moderate"
+   - "very active" → "very_active"
+   - User descriptions should map to the closest option
+5. If you cannot determine which option they mean, respond with: UNCLEAR
+"""
+
+_EXTRACT_PREFIX_FREEFORM = """You are extracting structured data from user responses.
+
+INSTRUCTIONS:
+1. Extract the user's answer from their natural language response
+2. Normalize common formats:
+   - Word numbers to digits: "four" → "4", "six" → "6", "zero" → "0"
+   - Days of week: Extract as comma-separated list if multiple mentioned
+   - Remove filler words and extract just the core answer
+3. If they say none/no/nothing, respond with: none
+4. If their response is unclear or off-topic, respond with: UNCLEAR
+"""
+
+# Bound concurrent extraction calls so simultaneous form users queue in
+# the app instead of oversubscribing Ollama's parallel slots
+_EXTRACT_SEMAPHORE = threading.BoundedSemaphore(
+    int(os.environ.get('OLLAMA_CONCURRENCY', 8))
+)
+
+# Shared extraction client (a thread-safe httpx wrapper): keeps the
+# connection pool alive across calls instead of paying TCP setup on
+# every answer extraction
+_EXTRACT_CLIENT = Client(host=os.environ.get("OLLAMA_HOST", "http://localhost:11434"))
+
+
+class _JsonbSet(Func):
+    """jsonb_set(target, path, new_value): patch one key server-side"""
+    function = 'jsonb_set'
+    output_field = JSONField()
+
+
+class _JsonbDeleteKeys(Func):
+    """jsonb - text[]: drop top-level keys server-side"""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = JSONField()
+
+
+def _jsonb_path(key: str):
+    """Build a text[] path literal for jsonb_set"""
+    return Value([key], output_field=ArrayField(TextField()))
+
+
+# Cache of resolved completion callbacks, keyed by dotted path.
+# Frequently-completed forms (e.g. daily check-ins) skip the repeated
+# import + attribute lookup.
+_CALLBACK_CACHE: Dict[str, Callable] = {}
+
+
+def _resolve_callback(callback_path) -> Callable:
+    """Resolve a dotted 'module.function' path, caching the result.
+    Configs may also hand over the function itself; that passes through."""
+    if callable(callback_path):
+        return callback_path
+    callback = _CALLBACK_CACHE.get(callback_path)
+    if callback is None:
+        module_path, function_name = callback_path.rsplit('.', 1)
+        module = importlib.import_module(module_path)
+        callback = getattr(module, function_name)
+        _CALLBACK_CACHE[callback_path] = callback
+    return callback
 
 
 class FormState:
@@ -20,7 +110,17 @@ class FormState:
             self.current_step = 0
         
         self.questions = questions or []
-    
+
+        # Precompute normalized valid values once per question so
+        # validate_and_save_answer doesn't re-normalize on every answer
+        self._normalized_valid = {}
+        for step, question in enumerate(self.questions):
+            if 'valid_values' in question:
+                self._normalized_valid[step] = {
+                    valid: valid.replace('_', ' ').replace('-', ' ')
+                    for valid in question['valid_values']
+                }
+
     def to_dict(self) -> Dict[str, Any]:
         """Serialize state for storage"""
         return {
@@ -30,23 +130,22 @@ class FormState:
     
     def get_current_question(self) -> Optional[str]:
         """Get the current question to ask"""
-        if self.current_step >= len(self.questions):
-            return None
-        
-        # Skip questions based on previous answers if needed
-        question = self.questions[self.current_step]
-        
-        # Check if this question should be skipped
-        if 'skip_if' in question:
-            skip_condition = question['skip_if']
-            if skip_condition(self.answers):
+        # Iterate past skipped questions - no recursion, so arbitrarily
+        # long skip chains cost one frame
+        while self.current_step < len(self.questions):
+            question = self.questions[self.current_step]
+
+            # Check if this question should be skipped
+            if 'skip_if' in question and question['skip_if'](self.answers):
                 # Save a default answer and move to next
                 if 'default_value' in question:
                     self.answers[question['key']] = question['default_value']
                 self.current_step += 1
-                return self.get_current_question()
-        
-        return question['question']
+                continue
+
+            return question['question']
+
+        return None
     
     def validate_and_save_answer(self, answer: str) -> Tuple[bool, str]:
         """
@@ -61,34 +160,21 @@ class FormState:
         
         # Check valid values if specified
         if 'valid_values' in question:
-            answer_lower = answer.lower()
-            matched = None
-            
-            # Enhanced fuzzy matching with common variations
-            answer_normalized = answer_lower.replace('_', ' ').replace('-', ' ')
-            
-            for valid in question['valid_values']:
-                valid_normalized = valid.replace('_', ' ').replace('-', ' ')
-                
-                # Exact match
-                if valid == answer_lower or valid_normalized == answer_normalized:
-                    matched = valid
-                    break
-                
-                # Substring match (either direction)
-                if valid in answer_lower or answer_lower in valid:
-                    matched = valid
-                    break
-                
-                # Normalized substring match
-                if valid_normalized in answer_normalized or answer_normalized in valid_normalized:
-                    matched = valid
-                    break
-            
-            if not matched:
+            answer_normalized = answer.lower().replace('_', ' ').replace('-', ' ')
+
+            # Fuzzy match against the precomputed normalized values.
+            # extractOne on a dict returns (normalized_value, score, original_valid)
+            match = process.extractOne(
+                answer_normalized,
+                self._normalized_valid[self.current_step],
+                scorer=fuzz.WRatio,
+                score_cutoff=75
+            )
+
+            if not match:
                 return False, f"I didn't understand '{answer}'. {question.get('error_msg', '')}"
-            
-            self.answers[question['key']] = matched
+
+            self.answers[question['key']] = match[2]
             self.current_step += 1
             return True, "Answer saved"
         
@@ -135,6 +221,7 @@ class FormHandler:
         self.user = user
         self.config = form_config
         self.state = self._load_state()
+        self._pending = None  # 'save' | 'clear' | None
     
     def _load_state(self) -> FormState:
         """Load form state from conversation memory"""
@@ -143,20 +230,48 @@ class FormHandler:
         return FormState(state_data, questions)
     
     def _save_state(self):
-        """Save form state to conversation memory"""
+        """Stage form state in conversation memory (written by _flush_state)"""
         self.conversation.short_term_memory['form_state'] = self.state.to_dict()
         self.conversation.short_term_memory['form_active'] = True
-        self.conversation.save(update_fields=['short_term_memory'])
-    
+        self._pending = 'save'
+
     def _clear_state(self):
-        """Clear form state from conversation memory"""
-        if 'form_state' in self.conversation.short_term_memory:
-            del self.conversation.short_term_memory['form_state']
-        if 'form_active' in self.conversation.short_term_memory:
-            del self.conversation.short_term_memory['form_active']
-        if 'form_config' in self.conversation.short_term_memory:
-            del self.conversation.short_term_memory['form_config']
-        self.conversation.save(update_fields=['short_term_memory'])
+        """Stage removal of form state from conversation memory"""
+        for key in _FORM_MEMORY_KEYS:
+            self.conversation.short_term_memory.pop(key, None)
+        # A clear supersedes any staged save of the same keys
+        self._pending = 'clear'
+
+    def _flush_state(self):
+        """
+        Push staged memory changes to Postgres as a server-side JSONB patch.
+        Sends only the form keys instead of rewriting the whole
+        short_term_memory blob, so a turn costs one small UPDATE and
+        concurrent writers can't clobber each other's keys.
+        """
+        from agents.models import Conversation
+
+        if self._pending == 'save':
+            Conversation.objects.filter(id=self.conversation.id).update(
+                short_term_memory=_JsonbSet(
+                    _JsonbSet(
+                        F('short_term_memory'),
+                        _jsonb_path('form_state'),
+                        Value(self.state.to_dict(), output_field=JSONField()),
+                    ),
+                    _jsonb_path('form_active'),
+                    Value(True, output_field=JSONField()),
+                )
+            )
+        elif self._pending == 'clear':
+            Conversation.objects.filter(id=self.conversation.id).update(
+                short_term_memory=_JsonbDeleteKeys(
+                    F('short_term_memory'),
+                    Value(_FORM_MEMORY_KEYS, output_field=ArrayField(TextField())),
+                )
+            )
+
+        self._pending = None
     
     @staticmethod
     def is_active(conversation) -> bool:
@@ -167,7 +282,8 @@ class FormHandler:
         """Start the form flow - returns welcome message with first question"""
         self.state = FormState(questions=self.config.get('questions', []))
         self._save_state()
-        
+        self._flush_state()
+
         first_question = self.state.get_current_question()
         welcome_msg = self.config.get('welcome_message', 'Let me help you fill out this form.')
         total_questions = len(self.config.get('questions', []))
@@ -201,19 +317,21 @@ I'll ask you {total_questions} questions.
         
         if not is_valid:
             return f"❌ {message}\n\nPlease try again."
-        
-        # Save progress
+
+        # Stage progress - flushed in one write below
         self._save_state()
-        
+
         # Check if form is complete
         if self.state.is_complete():
-            return self._handle_completion()
-        
-        # Get next question
-        next_question = self.state.get_current_question()
-        question_num = self.state.current_step + 1
-        
-        return f"✅ Got it!\n\n**Question {question_num}:** {next_question}"
+            response = self._handle_completion()
+        else:
+            # Get next question
+            next_question = self.state.get_current_question()
+            question_num = self.state.current_step + 1
+            response = f"✅ Got it!\n\n**Question {question_num}:** {next_question}"
+
+        self._flush_state()
+        return response
     
     def _extract_answer_with_llm(
         self, 
@@ -224,63 +342,65 @@ I'll ask you {total_questions} questions.
         Use LLM to extract the answer from user's natural language message.
         Returns the extracted answer or None if couldn't understand.
         """
-        # Build validation prompt based on question type
+        # Build validation prompt based on question type - precompiled
+        # static prefix + small dynamic suffix
         if 'valid_values' in question_info:
             valid_options = ', '.join(question_info['valid_values'])
-            validation_prompt = f"""You are extracting structured data from user responses.
+            validation_prompt = (
+                f"{_EXTRACT_PREFIX_VALID_VALUES}\n"
+                f"Question: {question_info['question']}\n\n"
+                f"VALID OPTIONS (you MUST choose one of these EXACT words):\n"
+                f"{valid_options}\n\n"
+                f'User said: "{user_message}"\n\n'
+                f"YOUR RESPONSE (one word from valid options only):"
+            )
 
-Question: {question_info['question']}
+            # Constrained decoding: the JSON-schema grammar forces the output
+            # to be exactly one of the valid options (or UNCLEAR), so the
+            # model can't ramble and extraction costs only a couple of tokens.
+            with _EXTRACT_SEMAPHORE:
+                response = _EXTRACT_CLIENT.chat(
+                    model="qwen3",
+                    messages=[
+                        {"role": "system", "content": "You are a precise data extraction assistant. Follow instructions exactly."},
+                        {"role": "user", "content": validation_prompt},
+                    ],
+                    format={"type": "string", "enum": list(question_info['valid_values']) + ["UNCLEAR"]},
+                )
 
-VALID OPTIONS (you MUST choose one of these EXACT words):
-{valid_options}
+            try:
+                extracted = json.loads(response['message']['content'])
+            except (ValueError, TypeError):
+                extracted = response['message']['content'].strip()
 
-User said: "{user_message}"
+            if extracted == "UNCLEAR":
+                return None
 
-INSTRUCTIONS:
-1. Read the user's response carefully
-2. Determine which valid option best matches their intent
-3. Respond with ONLY the exact option word from the valid list above
-4. Common variations to handle:
-   - "lightly active" → "light"
-   - "moderately active" → "moderate"  
-   - "very active" → "very_active"
-   - User descriptions should map to the closest option
-5. If you cannot determine which option they mean, respond with: UNCLEAR
+            return extracted
 
-YOUR RESPONSE (one word from valid options only):"""
-        
         else:
             # Free text extraction
-            validation_prompt = f"""You are extracting structured data from user responses.
-
-Question: {question_info['question']}
-
-User said: "{user_message}"
-
-INSTRUCTIONS:
-1. Extract the user's answer from their natural language response
-2. Normalize common formats:
-   - Word numbers to digits: "four" → "4", "six" → "6", "zero" → "0"
-   - Days of week: Extract as comma-separated list if multiple mentioned
-   - Remove filler words and extract just the core answer
-3. If they say none/no/nothing, respond with: none
-4. If their response is unclear or off-topic, respond with: UNCLEAR
-
-YOUR RESPONSE (extracted answer only):"""
+            validation_prompt = (
+                f"{_EXTRACT_PREFIX_FREEFORM}\n"
+                f"Question: {question_info['question']}\n\n"
+                f'User said: "{user_message}"\n\n'
+                f"YOUR RESPONSE (extracted answer only):"
+            )
         
-        # Call LLM for extraction
-        llm = LLMService(
+        # Call LLM for extraction (service instance cached across turns)
+        llm = get_llm_service(
             model_name="qwen3",
             base_url=os.environ.get("OLLAMA_BASE_URL"),
             system_prompt="You are a precise data extraction assistant. Follow instructions exactly.",
             max_tokens=8192
         )
         
-        result = llm.chat(
-            message=validation_prompt,
-            message_history={"messages": [], "usage": {}},
-            user=self.user
-        )
+        with _EXTRACT_SEMAPHORE:
+            result = llm.chat(
+                message=validation_prompt,
+                message_history={"messages": [], "usage": {}},
+                user=self.user
+            )
         
         extracted = result.output.strip()
         
@@ -298,11 +418,9 @@ YOUR RESPONSE (extracted answer only):"""
             callback_path = self.config.get('completion_callback')
             
             if callback_path:
-                # Import and call the callback
-                module_path, function_name = callback_path.rsplit('.', 1)
-                module = __import__(module_path, fromlist=[function_name])
-                callback = getattr(module, function_name)
-                
+                # Resolve the callback (cached after first completion)
+                callback = _resolve_callback(callback_path)
+
                 # Call with form data and user
                 success, message = callback(self.state.get_data(), self.user, self.conversation)
                 
@@ -1,18 +1,36 @@
 import json
+import time
 import traceback
 from ninja import Router
 from django.http import StreamingHttpResponse
+from django_q.tasks import async_task
 from pydantic_ai import ThinkingPart
 
 from agents.models import Agent
 from agents import registry
 from agents.services.embedding_service import EmbeddingService
+from agents.services.memory_service import MemoryService
 from .schemas import ChatRequest, ChatResponse, AgentSchema
-from .helpers import get_or_create_conversation, route_to_specialist, save_message
+from .helpers import get_or_create_conversation, get_operator_agent, route_to_specialist, save_message
 
 
 router = Router(tags=["chat"])
 
+# Precomputed SSE framing for content events: only the chunk text needs
+# JSON-escaping per frame, not the whole event dict
+_SSE_CONTENT_PREFIX = b'data: {"type": "content", "content": '
+_SSE_CONTENT_SUFFIX = b'}\n\n'
+
+# Coalesce tiny token deltas into one SSE frame: flush on either
+# threshold so framing overhead drops without hurting perceived latency
+_SSE_FLUSH_CHARS = 64
+_SSE_FLUSH_SECONDS = 0.02
+
+
+def _sse_content_frame(text: str) -> bytes:
+    """Build a content SSE frame as bytes"""
+    return _SSE_CONTENT_PREFIX + json.dumps(text).encode() + _SSE_CONTENT_SUFFIX
+
 @router.get("/agents", response=list[AgentSchema])
 def list_agents(request):
     """List all available agents"""
@@ -30,10 +48,8 @@ def chat_stream(request, payload: ChatRequest):
     )
     
     # Get Operator agent for error responses
-    operator_agent = Agent.objects.filter(name="Operator").first()
-    
-    embedding_service = EmbeddingService()
-    
+    operator_agent = get_operator_agent()
+
     def stream_response():
         stream = None
         agent = None
@@ -60,46 +76,66 @@ def chat_stream(request, payload: ChatRequest):
                 user=request.user
             )
             
+            buffer = []
+            buffered_chars = 0
+            last_flush = time.monotonic()
             for chunk in stream.stream_text(delta=True):
                 full_content += chunk
-                yield f"data: {json.dumps({'type': 'content', 'content': chunk})}\n\n"
+                buffer.append(chunk)
+                buffered_chars += len(chunk)
+                now = time.monotonic()
+                if buffered_chars >= _SSE_FLUSH_CHARS or now - last_flush >= _SSE_FLUSH_SECONDS:
+                    yield _sse_content_frame(''.join(buffer))
+                    buffer.clear()
+                    buffered_chars = 0
+                    last_flush = now
+            if buffer:
+                yield _sse_content_frame(''.join(buffer))
             
-            # Update memory (skip for mock streams that don't use LLM)
-            if not getattr(stream, 'skip_memory_update', False):
-                agent.update_memory(conversation, stream)
-            
-            # Extract reasoning
-            reasoning = None
+            # Fetch and serialize the message list once - reused by the
+            # memory task and debug capture, with no all_messages_json
+            # round-trip through a throwaway JSON string
             all_messages = stream.all_messages()
-            if all_messages:  # Only extract reasoning if there are messages
-                for part in all_messages[-1].parts:
-                    if isinstance(part, ThinkingPart):
-                        reasoning = part.content
-                        break
-            
-            # Generate embedding and save
-            exchange_text = f"User: {payload.message}\nAssistant: {full_content}"
-            exchange_embedding = embedding_service.generate_embedding(
-                text=exchange_text,
-                model="nomic-embed-text:v1.5"
-            )
-            
-            # Capture full debug data
             try:
-                debug_data = {'messages': json.loads(stream.all_messages_json())}
+                serialized_messages = MemoryService.serialize_messages(all_messages)
             except Exception:
-                debug_data = None
-            
-            save_message(
-                conversation=conversation,
-                user_prompt=payload.message,
-                ai_response=full_content,
+                serialized_messages = None
+
+            # Update memory on a Q worker - the client isn't waiting on this
+            # write (skip for mock streams that don't use LLM)
+            if not getattr(stream, 'skip_memory_update', False) and serialized_messages is not None:
+                async_task(
+                    'chat.tasks.update_conversation_memory',
+                    conversation.id,
+                    serialized_messages,
+                    MemoryService.create_usage_dict(stream),
+                )
+
+            # Extract reasoning (generator short-circuits on the first
+            # ThinkingPart instead of building intermediates)
+            reasoning = None
+            if all_messages:  # Only extract reasoning if there are messages
+                reasoning = next(
+                    (part.content for part in all_messages[-1].parts
+                     if isinstance(part, ThinkingPart)),
+                    None
+                )
+
+            # Capture full debug data from the already-serialized list
+            debug_data = {'messages': serialized_messages} if serialized_messages is not None else None
+
+            # Embedding generation + save don't affect what the user sees -
+            # hand them to a Q worker so the stream can close immediately
+            async_task(
+                'chat.tasks.persist_chat_exchange',
+                conversation.id,
+                payload.message,
+                full_content,
                 reasoning=reasoning,
                 timestamp=stream.timestamp(),
-                embedding=exchange_embedding,
                 debug_data=debug_data
             )
-            
+
             # End event
             yield f"data: {json.dumps({'type': 'end', 'conversation_id': conversation.id, 'agent_id': agent_model.id, 'agent_name': agent_model.name})}\n\n"
             
@@ -114,7 +150,7 @@ def chat_stream(request, payload: ChatRequest):
             traceback.print_exc()
             
             # Send error as a normal chat message from Operator
-            yield f"data: {json.dumps({'type': 'content', 'content': friendly_msg})}\n\n"
+            yield _sse_content_frame(friendly_msg)
             yield f"data: {json.dumps({'type': 'end', 'conversation_id': conversation.id, 'agent_id': operator_agent.id, 'agent_name': operator_agent.name})}\n\n"
     
     return StreamingHttpResponse(stream_response(), content_type="text/event-stream")
@@ -128,8 +164,8 @@ def chat(request, payload: ChatRequest):
     agent_model = None
     
     # Get Operator agent for error responses
-    operator_agent = Agent.objects.filter(name="Operator").first()
-    
+    operator_agent = get_operator_agent()
+
     try:
         conversation = get_or_create_conversation(
             user=request.user,
@@ -160,8 +196,9 @@ def chat(request, payload: ChatRequest):
             model="nomic-embed-text:v1.5"
         )
         
-        # Capture full debug data
-        debug_data = {'messages': json.loads(result.all_messages_json())}
+        # Capture full debug data (dump to a dict tree directly, skipping
+        # the all_messages_json serialize/deserialize round-trip)
+        debug_data = {'messages': MemoryService.serialize_messages(result.all_messages())}
         
         save_message(
             conversation=conversation,
@@ -2,19 +2,62 @@
 Helper utilities for chat API endpoints
 """
 import os
+import re
+from functools import lru_cache
 from django.shortcuts import get_object_or_404
 from agents.models import Agent, Conversation
-from agents.services.llm_service import LLMService
+from agents.services.llm_service import get_llm_service
 from agents import registry
 
 
+# Cheap keyword pre-filter for routing: messages that obviously belong
+# to a specialist skip the Operator LLM round-trip entirely.
+# Maps compiled pattern -> Agent.name in the database. Only list agents
+# with a registered implementation - the route persists the switch, so
+# an unroutable name would pin the conversation to a dead agent.
+FAST_ROUTES = [
+    (re.compile(r'\b(workout|exercise|gym|fitness|training|muscle|cardio)\b', re.I), 'Fitness Agent'),
+]
+
+
+@lru_cache(maxsize=8)
+def _get_agent_by_name_cached(name):
+    return Agent.objects.filter(name__iexact=name).first()
+
+
+def _get_agent_by_name(name):
+    """Cached Agent lookup for the fast-route table"""
+    agent = _get_agent_by_name_cached(name)
+    if agent is None:
+        # Don't pin a miss: the row may simply not be seeded yet, and a
+        # permanently cached None would keep the fast route dead until
+        # process restart
+        _get_agent_by_name_cached.cache_clear()
+    return agent
+
+
+@lru_cache(maxsize=1)
+def get_operator_agent():
+    """
+    Operator row used for error responses.
+    It's a singleton, so cache it per process and only pull the columns
+    the error path actually reads.
+    """
+    return Agent.objects.filter(name="Operator").only('id', 'name').first()
+
+
 def get_or_create_conversation(user, conversation_id=None, agent_id=None):
     """
     Get existing conversation or create new one.
     Defaults to Operator agent if no agent_id provided.
     """
     if conversation_id:
-        return get_object_or_404(Conversation, id=conversation_id)
+        # Pull the agent in the same query - route_to_specialist reads
+        # conversation.agent on every turn
+        return get_object_or_404(
+            Conversation.objects.select_related('agent'),
+            id=conversation_id
+        )
     
     # New conversation
     if agent_id is None:
@@ -48,8 +91,29 @@ def route_to_specialist(message, conversation, user):
         agent_name = agent_model.name.lower().replace(' ', '_')
         return agent_model, agent_name
     
-    # Use Operator to route
-    operator_llm = LLMService(
+    # Rule layer: route on an unambiguous keyword match before paying
+    # for an Operator LLM call
+    for pattern, name in FAST_ROUTES:
+        if pattern.search(message):
+            specialist = _get_agent_by_name(name)
+            if specialist:
+                agent_name = specialist.name.lower().replace(' ', '_')
+                # Never persist a switch to an agent with no registered
+                # implementation: route_to_specialist returns early for
+                # non-Operator agents, so a bad save would brick every
+                # later turn in the conversation. Fall through to the
+                # Operator instead.
+                if registry.get(agent_name) is None:
+                    continue
+                conversation.agent = specialist
+                # Only the agent column changed; a full-row save would
+                # also write the in-memory short_term_memory over what a
+                # Q worker may have updated since this row was loaded
+                conversation.save(update_fields=['agent'])
+                return specialist, agent_name
+
+    # Use Operator to route (service instance cached across requests)
+    operator_llm = get_llm_service(
         model_name=agent_model.model_name,
         base_url=os.environ.get("OLLAMA_BASE_URL"),
         system_prompt=agent_model.system_prompt,
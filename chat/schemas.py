@@ -1,7 +1,6 @@
 """Schemas for chat API"""
 from typing import Optional
 from ninja import Schema
-from pydantic import BaseModel
 
 
 class ChatRequest(Schema):
@@ -18,11 +17,8 @@ class ChatResponse(Schema):
     reasoning: Optional[str] = None
 
 
-class AgentSchema(BaseModel):
+class AgentSchema(Schema):
     id: int
     name: str
     model_name: str
     system_prompt: str
-    
-    class Config:
-        from_attributes = True
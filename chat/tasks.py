@@ -0,0 +1,47 @@
+"""
+Background tasks for chat (run by Django Q)
+"""
+from agents.services.embedding_service import EmbeddingService
+from .helpers import save_message
+
+
+def update_conversation_memory(conversation_id, messages, usage):
+    """
+    Persist short-term memory already serialized on the request path.
+    Only the DB write moves off the hot path - serialization has to
+    happen in the request anyway to hand the data to the worker.
+    """
+    from agents.models import Conversation
+
+    Conversation.objects.filter(id=conversation_id).update(
+        short_term_memory={"messages": messages, "usage": usage}
+    )
+
+
+def persist_chat_exchange(conversation_id, user_prompt, ai_response,
+                          reasoning=None, timestamp=None, debug_data=None):
+    """
+    Generate the exchange embedding and save the message.
+    Runs on a Q worker so the SSE stream can close as soon as the last
+    token is sent instead of waiting on the embedding round-trip + save.
+    """
+    from agents.models import Conversation
+
+    conversation = Conversation.objects.get(id=conversation_id)
+
+    embedding_service = EmbeddingService()
+    exchange_text = f"User: {user_prompt}\nAssistant: {ai_response}"
+    exchange_embedding = embedding_service.generate_embedding(
+        text=exchange_text,
+        model="nomic-embed-text:v1.5"
+    )
+
+    save_message(
+        conversation=conversation,
+        user_prompt=user_prompt,
+        ai_response=ai_response,
+        reasoning=reasoning,
+        timestamp=timestamp,
+        embedding=exchange_embedding,
+        debug_data=debug_data
+    )
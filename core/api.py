@@ -1,13 +1,14 @@
 from ninja_extra import NinjaExtraAPI
 from ninja_jwt.controller import NinjaJWTDefaultController
-from ninja_jwt.authentication import JWTAuth
 
 from chat.api import router as chat_router
+from core.auth import CachedJWTAuth
+from core.renderers import ORJSONRenderer
 from notifications.api import router as notifications_router
 
-api = NinjaExtraAPI()
+api = NinjaExtraAPI(renderer=ORJSONRenderer())
 
 api.register_controllers(NinjaJWTDefaultController)
 
-api.add_router("/chat/", chat_router, auth=JWTAuth())
-api.add_router("/notifications/", notifications_router, auth=JWTAuth())
\ No newline at end of file
+api.add_router("/chat/", chat_router, auth=CachedJWTAuth())
+api.add_router("/notifications/", notifications_router, auth=CachedJWTAuth())
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        # Register the pgvector column type once the app registry is up,
+        # instead of importing the ORM backend during settings load
+        from django.db.backends.postgresql.base import DatabaseWrapper
+        DatabaseWrapper.data_types['vector'] = 'vector'
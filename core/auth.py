@@ -0,0 +1,42 @@
+"""JWT authentication with short-TTL verification caching"""
+import hashlib
+import threading
+import time
+
+from ninja_jwt.authentication import JWTAuth
+
+
+# Successful verifications keyed by token hash. Signature verification
+# is pure CPU and access tokens live for a day, so re-verifying the same
+# bearer token on every poll is wasted work. Entries expire after a
+# short TTL; failed validations are never cached.
+_CACHE_TTL = 30
+_CACHE_MAX = 10000
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class CachedJWTAuth(JWTAuth):
+    """JWTAuth that remembers successful verifications for a short TTL"""
+
+    def authenticate(self, request, token):
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.monotonic()
+
+        with _cache_lock:
+            entry = _cache.get(key)
+        if entry is not None:
+            user, expires = entry
+            if expires > now:
+                request.user = user
+                return user
+
+        user = super().authenticate(request, token)
+
+        if user is not None:
+            with _cache_lock:
+                if len(_cache) >= _CACHE_MAX:
+                    _cache.clear()
+                _cache[key] = (user, now + _CACHE_TTL)
+
+        return user
@@ -1,26 +1,54 @@
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 from django_q.models import Schedule
 
 
+# Stable key for the advisory lock serializing schedule registration
+SCHEDULE_LOCK_KEY = 871349
+
+# Declarative schedule list - add new backup strategies here
+BACKUP_SCHEDULES = [
+    {
+        'name': 'Daily Database Backup',
+        'func': 'core.tasks.backup_database',  # or 'core.tasks.backup_database_docker'
+        'schedule_type': Schedule.DAILY,
+    },
+    {
+        'name': 'Hourly Incremental Backup',
+        'func': 'core.tasks.backup_database_incremental',
+        'schedule_type': Schedule.HOURLY,
+    },
+]
+
+
 class Command(BaseCommand):
-    help = 'Schedule daily database backups using Django Q'
+    help = 'Schedule database backups using Django Q'
 
     def handle(self, *args, **kwargs):
-        # Create or update the backup schedule
-        schedule, created = Schedule.objects.update_or_create(
-            name='Daily Database Backup',
-            defaults={
-                'func': 'core.tasks.backup_database',  # or 'core.tasks.backup_database_docker'
-                'schedule_type': Schedule.DAILY,
-                'repeats': -1,  # Run indefinitely
-                'next_run': None,  # Start immediately
-            }
-        )
-        
-        if created:
-            self.stdout.write(self.style.SUCCESS('✓ Created daily backup schedule'))
-        else:
-            self.stdout.write(self.style.SUCCESS('✓ Updated daily backup schedule'))
-        
-        self.stdout.write(f'Schedule ID: {schedule.id}')
-        self.stdout.write(f'Next run: {schedule.next_run}')
+        # Serialize concurrent runs (rolling deploys invoke this from
+        # several containers at once) behind an advisory lock; without
+        # it racing update_or_create calls can insert duplicate
+        # schedules, since Schedule.name isn't unique.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [SCHEDULE_LOCK_KEY])
+
+            # One update_or_create per schedule. A single
+            # bulk_create(update_conflicts=True) round-trip would be nicer,
+            # but that needs a unique constraint on name and django-q's
+            # Schedule model doesn't define one.
+            for spec in BACKUP_SCHEDULES:
+                schedule, created = Schedule.objects.update_or_create(
+                    name=spec['name'],
+                    defaults={
+                        'func': spec['func'],
+                        'schedule_type': spec['schedule_type'],
+                        'repeats': -1,  # Run indefinitely
+                        'next_run': None,  # Start immediately
+                    }
+                )
+
+                action = 'Created' if created else 'Updated'
+                self.stdout.write(self.style.SUCCESS(f"✓ {action} schedule '{schedule.name}'"))
+                self.stdout.write(f'Schedule ID: {schedule.id}')
+                self.stdout.write(f'Next run: {schedule.next_run}')
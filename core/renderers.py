@@ -0,0 +1,16 @@
+"""Custom response renderers"""
+import orjson
+from ninja.renderers import BaseRenderer
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson's C encoder.
+    Chat responses carry multi-KB LLM output; orjson serializes them
+    several times faster than stdlib json. datetimes/UUIDs are handled
+    natively, anything exotic falls back to str().
+    """
+    media_type = "application/json"
+
+    def render(self, request, data, *, response_status):
+        return orjson.dumps(data, default=str)
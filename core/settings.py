@@ -2,10 +2,6 @@ from pathlib import Path
 from datetime import timedelta
 import os
 
-import firebase_admin
-from firebase_admin import credentials
-from django.db.backends.postgresql.base import DatabaseWrapper
-
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,7 +26,14 @@ SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", 'django-insecure-85ua#kh!q=9s3%
 # SECURITY WARNING: don't run with debug turned on in production!
 # DEBUG = os.environ.get('DJANGO_DEBUG', 'False').lower() in ('true', '1', 'yes')
 
-ALLOWED_HOSTS = ['*']
+# Explicit hosts: the '*' wildcard defeated Django's exact-match fast
+# path in host validation and accepted any Host header
+ALLOWED_HOSTS = [
+    h.strip() for h in os.environ.get(
+        'DJANGO_ALLOWED_HOSTS',
+        'lifepal.app,localhost,127.0.0.1,192.168.1.229'
+    ).split(',') if h.strip()
+]
 
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost',
@@ -74,7 +77,9 @@ INSTALLED_APPS = [
     'wellbeing',
 
 ]
-# Django Q configuration (using ORM broker for scheduled/background tasks)
+# Django Q configuration. Prefer the Redis broker when REDIS_HOST is
+# set: the ORM broker has every worker polling Postgres with
+# SELECT ... FOR UPDATE, while Redis blocks on BLPOP with no polling.
 Q_CLUSTER = {
     'name': 'lifepal',
     'workers': 4,
@@ -83,9 +88,17 @@ Q_CLUSTER = {
     'retry': 120,
     'queue_limit': 50,
     'bulk': 10,
-    'orm': 'default',  # Use Django ORM as broker
 }
 
+if os.environ.get('REDIS_HOST'):
+    Q_CLUSTER['redis'] = {
+        'host': os.environ['REDIS_HOST'],
+        'port': int(os.environ.get('REDIS_PORT', 6379)),
+        'db': 0,
+    }
+else:
+    Q_CLUSTER['orm'] = 'default'  # Fallback: Django ORM broker
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -119,19 +132,31 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# Add pgvector extension to the database
-DatabaseWrapper.data_types['vector'] = 'vector'
+# The pgvector 'vector' column type is registered in CoreConfig.ready()
 
 
 # Database configuration using environment variables (matches docker-compose and deployment.env)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'django.db.backends.postgresql',
         'NAME': os.environ['DB_NAME'],
         'USER': os.environ['DB_USER'],
         'PASSWORD': os.environ['DB_PASSWORD'],
         'HOST': os.environ['DB_HOST'],
         'PORT': os.environ['DB_PORT'],
+        # Persistent connections: skip the per-request TCP + auth + backend
+        # fork overhead. Set DB_CONN_MAX_AGE=0 when running behind an
+        # external pooler like pgbouncer.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # With persistent connections, psycopg3 server-side prepares
+            # a statement after it repeats this many times, skipping
+            # parse/plan for the hot chat queries. (Django's native
+            # 'pool' option would require CONN_MAX_AGE=0, so persistent
+            # connections are used instead.)
+            'prepare_threshold': 3,
+        },
     }
 }
 
@@ -183,8 +208,7 @@ NINJA_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
 
-# Path to your Firebase Admin SDK JSON file
+# Path to your Firebase Admin SDK JSON file.
+# The app itself is initialized lazily on first use - see
+# notifications.firebase_client.get_firebase_app().
 FIREBASE_ADMIN_SDK_JSON = BASE_DIR / "notifications/firebase/lifepal-app-firebase-adminsdk.json"
-
-cred = credentials.Certificate(FIREBASE_ADMIN_SDK_JSON)
-firebase_admin.initialize_app(cred)
@@ -2,11 +2,19 @@
 Scheduled tasks for Django Q
 """
 import os
+import shutil
 import subprocess
 from datetime import datetime
+from functools import lru_cache
 from django.conf import settings
 
 
+@lru_cache(maxsize=1)
+def _db_config():
+    """Default database settings, resolved once per process"""
+    return settings.DATABASES['default']
+
+
 def backup_database():
     """
     Create a PostgreSQL backup using pg_dump.
@@ -16,45 +24,90 @@ def backup_database():
     backup_dir = os.path.join(settings.BASE_DIR.parent, 'backups')
     os.makedirs(backup_dir, exist_ok=True)
     
-    # Generate filename with timestamp
+    # Generate dump directory name with timestamp
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_file = os.path.join(backup_dir, f'lifepal_backup_{timestamp}.sql')
-    
-    # Database credentials from settings
-    db_config = settings.DATABASES['default']
+    backup_file = os.path.join(backup_dir, f'lifepal_backup_{timestamp}')
+
+    # Database credentials from settings (cached per process)
+    db_config = _db_config()
     db_name = db_config['NAME']
     db_user = db_config['USER']
     db_password = db_config.get('PASSWORD', '')
     db_host = db_config.get('HOST', 'localhost')
     db_port = db_config.get('PORT', '5432')
-    
-    # Set PGPASSWORD environment variable for pg_dump
-    env = os.environ.copy()
+
+    # Minimal child environment: pg_dump only needs PATH plus the
+    # password, and this keeps the rest of the parent environ (other
+    # secrets included) out of the child process
+    env = {'PATH': os.environ.get('PATH', '')}
     if db_password:
         env['PGPASSWORD'] = db_password
     
+    # Clean up old backups first (keep last 30 days) while the worker
+    # still owns the task
+    cleanup_old_backups(backup_dir, days=30)
+
     try:
-        # Run pg_dump
+        # Run pg_dump - directory format dumps tables in parallel, so wall
+        # time scales with -j instead of being gated on one compressor
         cmd = [
             'pg_dump',
             '-U', db_user,
             '-h', db_host,
             '-p', str(db_port),
-            '-F', 'c',  # Custom format (compressed)
+            '-F', 'd',  # Directory format (compressed, supports parallel dump)
+            '-j', '4',  # Dump up to 4 tables concurrently
             '-f', backup_file,
             db_name
         ]
-        
-        subprocess.run(cmd, env=env, check=True, capture_output=True)
-        
-        # Clean up old backups (keep last 30 days)
-        cleanup_old_backups(backup_dir, days=30)
-        
-        print(f"✓ Database backup created: {backup_file}")
-        return f"Backup successful: {backup_file}"
-        
-    except subprocess.CalledProcessError as e:
-        error_msg = f"Backup failed: {e.stderr.decode() if e.stderr else str(e)}"
+
+        # Detach the dump from the Q worker: the cluster's 60s task timeout
+        # would otherwise kill a long dump mid-write and hold one of the
+        # four workers for the whole run. Errors land in <backup>.err.
+        with open(f'{backup_file}.err', 'wb') as stderr_log:
+            proc = subprocess.Popen(
+                cmd,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_log,
+                start_new_session=True
+            )
+
+        print(f"✓ Database backup started (pid {proc.pid}): {backup_file}")
+        return f"Backup started: {backup_file}"
+
+    except OSError as e:
+        error_msg = f"Backup failed to start: {e}"
+        print(f"✗ {error_msg}")
+        return error_msg
+
+
+def backup_database_incremental():
+    """
+    Incremental physical backup via pgBackRest.
+    Copies only the changes since the last backup - O(changes) instead of
+    the O(database) work a full logical dump pays on every run.
+    Requires a configured 'lifepal' stanza on the database host; the
+    daily pg_dump task stays as the logical fallback.
+    """
+    try:
+        subprocess.run(
+            ['pgbackrest', '--stanza=lifepal', 'backup', '--type=incr'],
+            capture_output=True,
+            timeout=3600,
+            check=True
+        )
+        print("✓ Incremental backup completed")
+        return "Incremental backup successful"
+
+    except FileNotFoundError:
+        error_msg = "Incremental backup skipped: pgbackrest not installed"
+        print(f"✗ {error_msg}")
+        return error_msg
+
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        stderr = getattr(e, 'stderr', None)
+        error_msg = f"Incremental backup failed: {stderr.decode() if stderr else str(e)}"
         print(f"✗ {error_msg}")
         return error_msg
 
@@ -62,18 +115,23 @@ def backup_database():
 def cleanup_old_backups(backup_dir, days=30):
     """Remove backup files older than specified days"""
     import time
-    
-    current_time = time.time()
-    cutoff_time = current_time - (days * 86400)  # days to seconds
-    
-    for filename in os.listdir(backup_dir):
-        if filename.startswith('lifepal_backup_') and filename.endswith('.sql'):
-            file_path = os.path.join(backup_dir, filename)
-            file_modified = os.path.getmtime(file_path)
-            
-            if file_modified < cutoff_time:
-                os.remove(file_path)
-                print(f"Removed old backup: {filename}")
+
+    cutoff_time = time.time() - (days * 86400)  # days to seconds
+
+    # scandir reuses the stat data gathered during directory enumeration
+    # instead of issuing a second syscall per entry like getmtime would
+    with os.scandir(backup_dir) as entries:
+        for entry in entries:
+            # Directory-format dumps have no suffix; legacy dumps end in .sql
+            if not entry.name.startswith('lifepal_backup_'):
+                continue
+
+            if entry.stat().st_mtime < cutoff_time:
+                if entry.is_dir():
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+                print(f"Removed old backup: {entry.name}")
 
 
 def backup_database_docker():
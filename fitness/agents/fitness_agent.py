@@ -1,11 +1,109 @@
 """Fitness agent for handling fitness, nutrition, and health tracking"""
-from datetime import datetime, date
+import logging
+from datetime import date
 from decimal import Decimal
-from functools import wraps
+from functools import lru_cache, wraps
 from pydantic_ai import RunContext
 from agents.base import BaseAgent
 from agents import registry
 from agents.services.deps import AgentDeps
+from agents.models import Agent
+from chat.agents.form_agent import FormAgent
+from chat.agents.form_handler import FormHandler
+from fitness.models import Equipment, FitnessGoal, UserFitnessProfile, UserMeasurement, clear_equipment_caches
+
+logger = logging.getLogger(__name__)
+
+
+def _get_cached_profile(deps):
+    """
+    Fetch the user's fitness profile once per agent run and cache it on deps.
+    The LLM often chains several decorated tools in a single turn, and without
+    the cache each call re-issued the same profile SELECT.
+    Returns the profile instance or None.
+    """
+    if getattr(deps, '_fitness_profile_checked', None) is None:
+        deps._fitness_profile = (
+            UserFitnessProfile.objects
+            .prefetch_related('available_equipment')
+            .filter(user=deps.user)
+            .first()
+        )
+        deps._fitness_profile_checked = deps._fitness_profile is not None
+    return deps._fitness_profile
+
+
+# Hot-path argument validators, hoisted so each tool call does an O(1)
+# frozenset membership test instead of rebuilding a list literal. The
+# error-message strings are joined once at import time too. Derived from
+# the model choices where a named constant exists, so they can't drift.
+VALID_FITNESS_LEVELS = frozenset(value for value, _ in UserFitnessProfile.FITNESS_LEVEL_CHOICES)
+VALID_FITNESS_LEVELS_STR = ', '.join(sorted(VALID_FITNESS_LEVELS))
+
+VALID_LOCATIONS = frozenset({'home', 'gym', 'both'})
+VALID_LOCATIONS_STR = ', '.join(sorted(VALID_LOCATIONS))
+
+VALID_GOAL_STATUSES = frozenset(value for value, _ in FitnessGoal.STATUS_CHOICES)
+VALID_GOAL_STATUSES_STR = ', '.join(sorted(VALID_GOAL_STATUSES))
+
+# value -> label map so result formatting indexes a dict instead of
+# walking the model's choices list via get_measurement_type_display()
+# once per row. The valid-type set is derived from the same choices so
+# validation can't drift from the model.
+_MEASUREMENT_TYPE_LABELS = dict(UserMeasurement.MEASUREMENT_TYPE_CHOICES)
+VALID_MEASUREMENT_TYPES = frozenset(_MEASUREMENT_TYPE_LABELS)
+VALID_MEASUREMENT_TYPES_STR = ', '.join(sorted(VALID_MEASUREMENT_TYPES))
+
+_GOAL_STATUS_EMOJI = {
+    'in_progress': '🔄',
+    'completed': '✅',
+    'abandoned': '❌',
+}
+
+# .format(goal=...) templates; hoisted so the dict isn't rebuilt (and
+# every message formatted) on each status update
+_GOAL_STATUS_MESSAGES = {
+    'completed': "🎉 Congratulations! Goal '{goal}' marked as completed!",
+    'abandoned': "Goal '{goal}' has been abandoned.",
+    'in_progress': "Goal '{goal}' is now back in progress.",
+}
+
+
+@lru_cache(maxsize=1)
+def _get_form_agent():
+    """
+    Cache the FormAgent reference row. It's a static record fetched on
+    every onboarding trigger; the full row is kept (rather than .only())
+    because FormAgent reads its prompt fields.
+    """
+    return Agent.objects.get(name='FormAgent')
+
+
+@lru_cache(maxsize=1)
+def _all_equipment_ids():
+    """
+    PK list for the full equipment catalogue. M2M .set() only needs PKs,
+    so caching these skips re-fetching every Equipment row each time a
+    gym profile is created. Cleared whenever new equipment is inserted.
+    """
+    return tuple(Equipment.objects.values_list('id', flat=True))
+
+
+def _get_or_create_equipment(names):
+    """
+    Resolve equipment names to rows in a fixed number of queries instead of
+    a get_or_create (SELECT + optional INSERT) per name: one SELECT for
+    existing rows, one bulk INSERT for the missing ones, one re-fetch
+    covering both.
+    """
+    existing = set(Equipment.objects.filter(name__in=names).values_list('name', flat=True))
+    missing = [Equipment(name=n) for n in names if n not in existing]
+    if missing:
+        # bulk_create fires no post_save signals, so drop every module's
+        # equipment PK cache explicitly - not just this one's
+        Equipment.objects.bulk_create(missing, ignore_conflicts=True)
+        clear_equipment_caches()
+    return list(Equipment.objects.filter(name__in=names))
 
 
 def require_fitness_profile(func):
@@ -15,14 +113,11 @@ def require_fitness_profile(func):
     """
     @wraps(func)
     def wrapper(ctx: RunContext[AgentDeps], *args, **kwargs):
-        from fitness.models import UserFitnessProfile
-        
-        user = ctx.deps.user
-        if not UserFitnessProfile.objects.filter(user=user).exists():
+        if _get_cached_profile(ctx.deps) is None:
             return "❌ Please complete your fitness profile setup first. Would you like to create your profile now?"
-        
+
         return func(ctx, *args, **kwargs)
-    
+
     return wrapper
 
 
@@ -39,98 +134,74 @@ class FitnessAgent(BaseAgent):
     has completed their fitness profile setup.
     """
     
-    def process_message_stream(self, message: str, conversation, user=None):
-        """Override to handle onboarding before LLM processing"""
-        from fitness.models import UserFitnessProfile
-        from chat.agents.form_handler import FormHandler
-        from agents.models import Agent
-        
-        # Reload conversation to get latest state
-        conversation.refresh_from_db()
-        
-        print(f"[FITNESS] Checking onboarding state for conversation {conversation.id}")
-        print(f"[FITNESS] short_term_memory keys: {list(conversation.short_term_memory.keys())}")
-        print(f"[FITNESS] form_active: {conversation.short_term_memory.get('form_active', False)}")
-        
-        # Check if form is active (we're in form mode)
+    def _maybe_delegate_to_form_agent(self, message, conversation, user, streaming):
+        """
+        Shared onboarding check for both process methods. Returns the
+        delegated FormAgent result/generator, or None to signal that
+        normal LLM processing should continue.
+        """
+        # Reload only the fields this path consults; the conversation row
+        # carries large JSON memory columns we don't need to re-pull
+        conversation.refresh_from_db(fields=['short_term_memory', 'agent'])
+
+        if logger.isEnabledFor(logging.DEBUG):
+            # Guarded: materializing the key list is wasted work when
+            # DEBUG output is filtered anyway
+            logger.debug("Checking onboarding state for conversation %s", conversation.id)
+            logger.debug("short_term_memory keys: %s", list(conversation.short_term_memory.keys()))
+            logger.debug("form_active: %s", conversation.short_term_memory.get('form_active', False))
+
+        # Check if form is active (we're in form mode). This shouldn't
+        # happen as the conversation should be with FormAgent - but just
+        # in case, let normal processing continue.
         if FormHandler.is_active(conversation):
-            print(f"[FITNESS] Form is active - conversation is with FormAgent")
-            # This shouldn't happen as conversation should be with FormAgent
-            # But just in case, let normal processing continue
-            return super().process_message_stream(message, conversation, user)
-        
+            logger.debug("Form is active - conversation is with FormAgent")
+            return None
+
         # Check if user needs onboarding (no profile exists)
-        try:
-            UserFitnessProfile.objects.get(user=user)
-            print(f"[FITNESS] Profile exists - proceeding with normal coaching")
-        except UserFitnessProfile.DoesNotExist:
-            # No profile - trigger form mode
-            print(f"[FITNESS] No profile found - triggering onboarding form for {user.username}")
-            
-            # Get FormAgent
-            form_agent = Agent.objects.get(name='FormAgent')
-            
-            # Store form reference in memory (not the full config - it has functions)
-            conversation.short_term_memory['form_type'] = 'fitness_onboarding'
-            conversation.short_term_memory['form_module'] = 'fitness.agents.onboarding_form_config'
-            conversation.short_term_memory['return_to_agent'] = conversation.agent.id
-            conversation.short_term_memory['form_active'] = True
-            
-            # Switch conversation to FormAgent
-            conversation.agent = form_agent
-            conversation.save()
-            
-            print(f"[FITNESS] Switched conversation to FormAgent")
-            
-            # Let FormAgent handle this message
-            from chat.agents.form_agent import FormAgent
-            form_agent_instance = FormAgent(agent_model=form_agent)
+        if UserFitnessProfile.objects.filter(user=user).exists():
+            logger.debug("Profile exists - proceeding with normal coaching")
+            return None
+
+        # No profile - trigger form mode
+        logger.debug("No profile found - triggering onboarding form for %s", user.username)
+
+        # Get FormAgent (cached)
+        form_agent = _get_form_agent()
+
+        # Store form reference in memory (not the full config - it has functions)
+        conversation.short_term_memory.update({
+            'form_type': 'fitness_onboarding',
+            'form_module': 'fitness.agents.onboarding_form_config',
+            'return_to_agent': conversation.agent.id,
+            'form_active': True,
+        })
+
+        # Switch conversation to FormAgent; only two columns changed,
+        # so keep the UPDATE statement to those
+        conversation.agent = form_agent
+        conversation.save(update_fields=['short_term_memory', 'agent'])
+
+        logger.debug("Switched conversation to FormAgent")
+
+        # Let FormAgent handle this message
+        form_agent_instance = FormAgent(agent_model=form_agent)
+        if streaming:
             return form_agent_instance.process_message_stream(message, conversation, user)
-        
-        # Normal LLM processing
+        return form_agent_instance.process_message(message, conversation, user)
+
+    def process_message_stream(self, message: str, conversation, user=None):
+        """Override to handle onboarding before LLM processing"""
+        delegated = self._maybe_delegate_to_form_agent(message, conversation, user, streaming=True)
+        if delegated is not None:
+            return delegated
         return super().process_message_stream(message, conversation, user)
-    
+
     def process_message(self, message: str, conversation, user=None):
         """Override to handle onboarding before LLM processing"""
-        from fitness.models import UserFitnessProfile
-        from chat.agents.form_handler import FormHandler
-        from agents.models import Agent
-        
-        # Reload conversation to get latest state
-        conversation.refresh_from_db()
-        
-        # Check if form is active (we're in form mode)
-        if FormHandler.is_active(conversation):
-            # This shouldn't happen as conversation should be with FormAgent
-            # But just in case, let normal processing continue
-            return super().process_message(message, conversation, user)
-        
-        # Check if user needs onboarding (no profile exists)
-        try:
-            UserFitnessProfile.objects.get(user=user)
-        except UserFitnessProfile.DoesNotExist:
-            # No profile - trigger form mode
-            print(f"[FITNESS] No profile found - triggering onboarding form for {user.username}")
-            
-            # Get FormAgent
-            form_agent = Agent.objects.get(name='FormAgent')
-            
-            # Store form reference in memory (not the full config - it has functions)
-            conversation.short_term_memory['form_type'] = 'fitness_onboarding'
-            conversation.short_term_memory['form_module'] = 'fitness.agents.onboarding_form_config'
-            conversation.short_term_memory['return_to_agent'] = conversation.agent.id
-            conversation.short_term_memory['form_active'] = True
-            
-            # Switch conversation to FormAgent
-            conversation.agent = form_agent
-            conversation.save()
-            
-            # Let FormAgent handle this message
-            from chat.agents.form_agent import FormAgent
-            form_agent_instance = FormAgent(agent_model=form_agent)
-            return form_agent_instance.process_message(message, conversation, user)
-        
-        # Normal LLM processing
+        delegated = self._maybe_delegate_to_form_agent(message, conversation, user, streaming=False)
+        if delegated is not None:
+            return delegated
         return super().process_message(message, conversation, user)
     
     def get_system_prompt(self) -> str:
@@ -158,17 +229,16 @@ def get_fitness_profile(ctx: RunContext[AgentDeps]) -> str:
     Returns:
         User's fitness profile details or a message indicating no profile exists
     """
-    from fitness.models import UserFitnessProfile
-    
     user = ctx.deps.user
-    print(f"[FITNESS] get_fitness_profile called for user: {user.username}")
-    
-    try:
-        profile = UserFitnessProfile.objects.get(user=user)
-        print(f"[FITNESS] Profile found for {user.username}")
+    logger.debug("get_fitness_profile called for user: %s", user.username)
+
+    profile = _get_cached_profile(ctx.deps)
+    if profile is not None:
+        logger.debug("Profile found for %s", user.username)
         
-        # Format equipment list
-        equipment_names = list(profile.available_equipment.values_list('name', flat=True))
+        # Format equipment list (.all() hits the prefetch cache;
+        # values_list would issue a fresh query)
+        equipment_names = [e.name for e in profile.available_equipment.all()]
         equipment_str = ', '.join(equipment_names) if equipment_names else 'None specified'
         
         # Format days
@@ -187,10 +257,9 @@ def get_fitness_profile(ctx: RunContext[AgentDeps]) -> str:
 • Restrictions: {profile.restrictions or 'None'}
 • Profile created: {profile.created_at.strftime('%Y-%m-%d')}
 • Last updated: {profile.updated_at.strftime('%Y-%m-%d')}"""
-    
-    except UserFitnessProfile.DoesNotExist:
-        print(f"[FITNESS] No profile found for {user.username}")
-        return "No fitness profile found. User needs to complete onboarding to create their fitness profile."
+
+    logger.debug("No profile found for %s", user.username)
+    return "No fitness profile found. User needs to complete onboarding to create their fitness profile."
 
 
 def create_or_update_fitness_profile(
@@ -227,25 +296,19 @@ def create_or_update_fitness_profile(
     Returns:
         Confirmation message about profile creation/update
     """
-    from fitness.models import UserFitnessProfile, Equipment
-    
     user = ctx.deps.user
-    print(f"[FITNESS] create_or_update_fitness_profile called for user: {user.username}")
-    print(f"[FITNESS] Parameters: level={fitness_level}, ex_per_week={exercises_per_week}, runs_per_week={runs_per_week}")
-    print(f"[FITNESS] Days: exercise={exercise_days}, run={run_days}")
-    print(f"[FITNESS] Location: {exercise_location}, injuries: {injuries}, restrictions: {restrictions}")
-    
-    # Valid choices
-    valid_fitness_levels = ['inactive', 'light', 'moderate', 'active', 'very_active']
-    valid_locations = ['home', 'gym', 'both']
+    logger.debug("create_or_update_fitness_profile called for user: %s", user.username)
+    logger.debug("Parameters: level=%s, ex_per_week=%s, runs_per_week=%s", fitness_level, exercises_per_week, runs_per_week)
+    logger.debug("Days: exercise=%s, run=%s", exercise_days, run_days)
+    logger.debug("Location: %s, injuries: %s, restrictions: %s", exercise_location, injuries, restrictions)
     
     # Validate fitness_level
-    if fitness_level not in valid_fitness_levels:
-        return f"Invalid fitness level '{fitness_level}'. Must be one of: {', '.join(valid_fitness_levels)}"
-    
+    if fitness_level not in VALID_FITNESS_LEVELS:
+        return f"Invalid fitness level '{fitness_level}'. Must be one of: {VALID_FITNESS_LEVELS_STR}"
+
     # Validate exercise_location
-    if exercise_location not in valid_locations:
-        return f"Invalid exercise location '{exercise_location}'. Must be one of: {', '.join(valid_locations)}"
+    if exercise_location not in VALID_LOCATIONS:
+        return f"Invalid exercise location '{exercise_location}'. Must be one of: {VALID_LOCATIONS_STR}"
     
     # Get or create profile
     profile, created = UserFitnessProfile.objects.get_or_create(
@@ -289,22 +352,23 @@ def create_or_update_fitness_profile(
         
         profile.restrictions = restrictions
         updates.append("restrictions information")
-        
-        profile.save()
+
+        profile.save(update_fields=[
+            'fitness_level', 'exercises_per_week', 'runs_per_week',
+            'exercise_days', 'run_days', 'exercise_location',
+            'injuries', 'restrictions', 'updated_at',
+        ])
     
     # Handle equipment - auto-assign based on location or use provided list
     if equipment_names is not None:
         # Explicitly provided equipment list
         profile.available_equipment.clear()
-        added_equipment = []
-        
-        for eq_name in equipment_names:
-            equipment, _ = Equipment.objects.get_or_create(name=eq_name.strip())
-            profile.available_equipment.add(equipment)
-            added_equipment.append(eq_name)
-        
-        if added_equipment:
-            updates.append(f"equipment to {', '.join(added_equipment)}")
+        names = [n.strip() for n in equipment_names if n.strip()]
+
+        if names:
+            # Single through-table INSERT for the whole batch
+            profile.available_equipment.add(*_get_or_create_equipment(names))
+            updates.append(f"equipment to {', '.join(names)}")
         else:
             updates.append("equipment (cleared)")
     else:
@@ -312,9 +376,9 @@ def create_or_update_fitness_profile(
         location = profile.exercise_location
         
         if location == 'gym' or location == 'both':
-            # Gym access = all equipment available
-            all_equipment = Equipment.objects.all()
-            profile.available_equipment.set(all_equipment)
+            # Gym access = all equipment available; set() accepts PKs so
+            # the cached id list avoids fetching the whole catalogue
+            profile.available_equipment.set(_all_equipment_ids())
             if not created:
                 updates.append("equipment (all equipment - gym access)")
         elif location == 'home':
@@ -323,20 +387,22 @@ def create_or_update_fitness_profile(
             profile.available_equipment.set([bodyweight])
             if not created:
                 updates.append("equipment (bodyweight - home)")
-    
+
+    # Keep the per-run cache in sync with what was just written
+    ctx.deps._fitness_profile = profile
+    ctx.deps._fitness_profile_checked = True
+
     if created:
         result = f"✓ Fitness profile created successfully! You can now start your fitness journey."
-        print(f"[FITNESS] ✓ Profile creation completed successfully for {user.username}")
-        print(f"[FITNESS] Returning result to LLM: {result}")
+        logger.debug("Profile creation completed successfully for %s", user.username)
         return result
     elif updates:
         result = f"✓ Fitness profile updated: {', '.join(updates)}"
-        print(f"[FITNESS] ✓ Profile update completed for {user.username}")
-        print(f"[FITNESS] Returning result to LLM: {result}")
+        logger.debug("Profile update completed for %s", user.username)
         return result
     else:
         result = "No changes made to fitness profile."
-        print(f"[FITNESS] No changes made for {user.username}")
+        logger.debug("No changes made for %s", user.username)
         return result
 
 
@@ -363,11 +429,9 @@ def add_home_equipment(
         - add_home_equipment(equipment_names=['dumbbells', 'resistance bands'])
         - add_home_equipment(equipment_names=['kettlebell', 'yoga mat', 'pull-up bar'])
     """
-    from fitness.models import UserFitnessProfile, Equipment
-    
     user = ctx.deps.user
-    profile = UserFitnessProfile.objects.get(user=user)
-    
+    profile = ctx.deps._fitness_profile  # guaranteed by @require_fitness_profile
+
     # Check if user exercises at home
     if profile.exercise_location not in ['home', 'both']:
         return "Equipment management is primarily for home workouts. Your profile shows you exercise at the gym where all equipment is available."
@@ -376,16 +440,13 @@ def add_home_equipment(
         return "No equipment specified. Please provide equipment names."
     
     # Add equipment to existing equipment (don't replace)
-    added_equipment = []
-    for eq_name in equipment_names:
-        equipment, created = Equipment.objects.get_or_create(name=eq_name.strip().lower())
-        profile.available_equipment.add(equipment)
-        added_equipment.append(eq_name)
-    
+    names = [n.strip().lower() for n in equipment_names if n.strip()]
+    profile.available_equipment.add(*_get_or_create_equipment(names))
+
     # Get current equipment list
     current_equipment = list(profile.available_equipment.values_list('name', flat=True))
-    
-    return f"✓ Added equipment: {', '.join(added_equipment)}\n\nYour current equipment: {', '.join(current_equipment)}"
+
+    return f"✓ Added equipment: {', '.join(names)}\n\nYour current equipment: {', '.join(current_equipment)}"
 
 
 @require_fitness_profile
@@ -411,19 +472,19 @@ def create_fitness_goal(
         - create_fitness_goal(goal="Lose 10 kg", target_date="2026-06-01", success_metrics="Weight under 70kg")
         - create_fitness_goal(goal="Build muscle", target_date="2026-12-31", success_metrics="Increase bench press by 20kg")
     """
-    from fitness.models import FitnessGoal
-    
     user = ctx.deps.user
     
-    # Validate and parse target_date
+    # Validate and parse target_date (fromisoformat is the C fast path
+    # for YYYY-MM-DD, no format-string interpretation)
     try:
-        parsed_date = datetime.strptime(target_date, '%Y-%m-%d').date()
+        parsed_date = date.fromisoformat(target_date)
     except ValueError:
         return f"Invalid date format '{target_date}'. Please use YYYY-MM-DD format (e.g., '2026-06-01')."
-    
+
     # Check if date is in the future
-    if parsed_date <= date.today():
-        return f"Target date must be in the future. Today is {date.today().strftime('%Y-%m-%d')}."
+    today = date.today()
+    if parsed_date <= today:
+        return f"Target date must be in the future. Today is {today.strftime('%Y-%m-%d')}."
     
     # Create the goal
     fitness_goal = FitnessGoal.objects.create(
@@ -449,44 +510,37 @@ def get_fitness_goals(ctx: RunContext[AgentDeps], status: str = None) -> str:
     Returns:
         List of user's fitness goals
     """
-    from fitness.models import FitnessGoal
-    
     user = ctx.deps.user
     
     # Build query
     query = FitnessGoal.objects.filter(user=user)
     
     if status:
-        valid_statuses = ['in_progress', 'completed', 'abandoned']
-        if status not in valid_statuses:
-            return f"Invalid status '{status}'. Must be one of: {', '.join(valid_statuses)}"
+        if status not in VALID_GOAL_STATUSES:
+            return f"Invalid status '{status}'. Must be one of: {VALID_GOAL_STATUSES_STR}"
         query = query.filter(status=status)
     
     goals = query.order_by('-created_at')
-    
-    if not goals.exists():
+
+    # Stream rows straight from the cursor into the join; iterator()
+    # skips buffering the whole history in the queryset cache, and the
+    # emptiness check falls out of the joined string, replacing a
+    # separate exists() query.
+    body = "\n\n".join(
+        f"{_GOAL_STATUS_EMOJI.get(g.status, '•')} {g.goal}\n"
+        f"   Target: {g.target_date:%Y-%m-%d}\n"
+        f"   Success metrics: {g.success_metrics}\n"
+        f"   Status: {g.get_status_display()}\n"
+        f"   Created: {g.created_at:%Y-%m-%d}"
+        for g in goals.iterator(chunk_size=100)
+    )
+
+    if not body:
         if status:
             return f"No {status.replace('_', ' ')} fitness goals found."
         return "No fitness goals found. User hasn't set any goals yet."
-    
-    # Format results
-    results = []
-    for g in goals:
-        status_emoji = {
-            'in_progress': '🔄',
-            'completed': '✅',
-            'abandoned': '❌'
-        }.get(g.status, '•')
-        
-        results.append(
-            f"{status_emoji} {g.goal}\n"
-            f"   Target: {g.target_date.strftime('%Y-%m-%d')}\n"
-            f"   Success metrics: {g.success_metrics}\n"
-            f"   Status: {g.get_status_display()}\n"
-            f"   Created: {g.created_at.strftime('%Y-%m-%d')}"
-        )
-    
-    return "Fitness Goals:\n\n" + "\n\n".join(results)
+
+    return "Fitness Goals:\n\n" + body
 
 
 @require_fitness_profile
@@ -510,40 +564,41 @@ def update_fitness_goal_status(
         - update_fitness_goal_status(goal_description="Lose 10 kg", new_status="completed")
         - update_fitness_goal_status(goal_description="Run a 5K", new_status="abandoned")
     """
-    from fitness.models import FitnessGoal
-    
     user = ctx.deps.user
     
-    valid_statuses = ['in_progress', 'completed', 'abandoned']
-    if new_status not in valid_statuses:
-        return f"Invalid status '{new_status}'. Must be one of: {', '.join(valid_statuses)}"
+    if new_status not in VALID_GOAL_STATUSES:
+        return f"Invalid status '{new_status}'. Must be one of: {VALID_GOAL_STATUSES_STR}"
     
-    # Find goal by description (case-insensitive partial match)
-    goals = FitnessGoal.objects.filter(
+    # Find goal by description (case-insensitive partial match). Two rows
+    # are enough to tell zero / one / many apart in a single query,
+    # instead of separate exists() + count() + first() round-trips.
+    matches = list(FitnessGoal.objects.filter(
         user=user,
         goal__icontains=goal_description
-    )
-    
-    if not goals.exists():
+    )[:2])
+
+    if not matches:
         return f"No fitness goal found matching '{goal_description}'. Please check the goal description."
-    
-    if goals.count() > 1:
-        goal_list = "\n".join([f"- {g.goal}" for g in goals])
+
+    if len(matches) > 1:
+        # Rare disambiguation path - re-query without the limit, fetching
+        # only the goal text rather than full rows
+        goal_names = FitnessGoal.objects.filter(
+            user=user, goal__icontains=goal_description
+        ).values_list('goal', flat=True)
+        goal_list = "\n".join(f"- {g}" for g in goal_names)
         return f"Multiple goals match '{goal_description}':\n{goal_list}\n\nPlease be more specific."
-    
+
     # Update the goal
-    goal = goals.first()
+    goal = matches[0]
     old_status = goal.get_status_display()
     goal.status = new_status
-    goal.save()
+    goal.save(update_fields=['status'])
     
-    status_messages = {
-        'completed': f"🎉 Congratulations! Goal '{goal.goal}' marked as completed!",
-        'abandoned': f"Goal '{goal.goal}' has been abandoned.",
-        'in_progress': f"Goal '{goal.goal}' is now back in progress."
-    }
-    
-    return status_messages.get(new_status, f"✓ Goal status updated from {old_status} to {goal.get_status_display()}.")
+    template = _GOAL_STATUS_MESSAGES.get(new_status)
+    if template:
+        return template.format(goal=goal.goal)
+    return f"✓ Goal status updated from {old_status} to {goal.get_status_display()}."
 
 
 @require_fitness_profile
@@ -574,23 +629,15 @@ def add_measurement(
         - add_measurement(measurement_type='body_fat', value=18.5, notes='Morning measurement after workout')
         - add_measurement(measurement_type='waist_circumference', value=85.0, date_recorded='2026-01-01')
     """
-    from fitness.models import UserMeasurement
-    
     user = ctx.deps.user
     
-    # Valid measurement types
-    valid_types = [
-        'weight', 'body_fat', 'bmi', 'muscle_mass', 'waist_circumference',
-        'hip_circumference', 'bicep_circumference', 'chest_circumference', 'thigh_circumference'
-    ]
-    
-    if measurement_type not in valid_types:
-        return f"Invalid measurement type '{measurement_type}'. Must be one of: {', '.join(valid_types)}"
+    if measurement_type not in VALID_MEASUREMENT_TYPES:
+        return f"Invalid measurement type '{measurement_type}'. Must be one of: {VALID_MEASUREMENT_TYPES_STR}"
     
     # Parse date if provided, otherwise use today
     if date_recorded:
         try:
-            parsed_date = datetime.strptime(date_recorded, '%Y-%m-%d').date()
+            parsed_date = date.fromisoformat(date_recorded)
         except ValueError:
             return f"Invalid date format '{date_recorded}'. Please use YYYY-MM-DD format (e.g., '2026-01-01')."
     else:
@@ -610,7 +657,7 @@ def add_measurement(
     )
     
     # Get display name
-    type_display = measurement.get_measurement_type_display()
+    type_display = _MEASUREMENT_TYPE_LABELS[measurement_type]
     
     return f"✓ Recorded {type_display}: {value} on {parsed_date.strftime('%Y-%m-%d')}"
 
@@ -636,25 +683,20 @@ def get_measurements(
         - get_measurements(measurement_type='weight', limit=5)
         - get_measurements(limit=20)  # Get last 20 measurements of all types
     """
-    from fitness.models import UserMeasurement
-    
     user = ctx.deps.user
     
     # Build query
     query = UserMeasurement.objects.filter(user=user)
     
     if measurement_type:
-        valid_types = [
-            'weight', 'body_fat', 'bmi', 'muscle_mass', 'waist_circumference',
-            'hip_circumference', 'bicep_circumference', 'chest_circumference', 'thigh_circumference'
-        ]
-        if measurement_type not in valid_types:
-            return f"Invalid measurement type '{measurement_type}'. Must be one of: {', '.join(valid_types)}"
+        if measurement_type not in VALID_MEASUREMENT_TYPES:
+            return f"Invalid measurement type '{measurement_type}'. Must be one of: {VALID_MEASUREMENT_TYPES_STR}"
         query = query.filter(measurement_type=measurement_type)
     
-    measurements = query.order_by('-date_recorded')[:limit]
-    
-    if not measurements.exists():
+    # Materialize once; a separate .exists() would run a second SELECT
+    measurements = list(query.order_by('-date_recorded')[:limit])
+
+    if not measurements:
         if measurement_type:
             return f"No {measurement_type} measurements found."
         return "No measurements recorded yet."
@@ -662,17 +704,16 @@ def get_measurements(
     # Format results
     results = []
     for m in measurements:
-        type_display = m.get_measurement_type_display()
+        type_display = _MEASUREMENT_TYPE_LABELS.get(m.measurement_type, m.measurement_type)
         result_line = f"📊 {m.date_recorded.strftime('%Y-%m-%d')}: {type_display} = {m.value}"
         if m.notes:
             result_line += f"\n   Note: {m.notes}"
         results.append(result_line)
     
-    header = f"Measurement History (last {len(measurements)}):"
     if measurement_type:
-        type_obj = UserMeasurement()
-        type_obj.measurement_type = measurement_type
-        header = f"{type_obj.get_measurement_type_display()} History (last {len(measurements)}):"
+        header = f"{_MEASUREMENT_TYPE_LABELS[measurement_type]} History (last {len(measurements)}):"
+    else:
+        header = f"Measurement History (last {len(measurements)}):"
     
     return header + "\n\n" + "\n\n".join(results)
 
@@ -698,42 +739,37 @@ def get_latest_measurement(
         - get_latest_measurement(measurement_type='weight')
         - get_latest_measurement(measurement_type='body_fat')
     """
-    from fitness.models import UserMeasurement
-    
     user = ctx.deps.user
     
-    valid_types = [
-        'weight', 'body_fat', 'bmi', 'muscle_mass', 'waist_circumference',
-        'hip_circumference', 'bicep_circumference', 'chest_circumference', 'thigh_circumference'
-    ]
-    
-    if measurement_type not in valid_types:
-        return f"Invalid measurement type '{measurement_type}'. Must be one of: {', '.join(valid_types)}"
+    if measurement_type not in VALID_MEASUREMENT_TYPES:
+        return f"Invalid measurement type '{measurement_type}'. Must be one of: {VALID_MEASUREMENT_TYPES_STR}"
     
-    # Get latest measurement
-    measurement = UserMeasurement.objects.filter(
+    # Fetch the latest few rows in a single query; the trend line below
+    # compares against the most recent strictly earlier date, so the
+    # extra row is headroom for a same-day re-measurement
+    recent = list(UserMeasurement.objects.filter(
         user=user,
         measurement_type=measurement_type
-    ).order_by('-date_recorded').first()
-    
-    if not measurement:
-        type_obj = UserMeasurement()
-        type_obj.measurement_type = measurement_type
-        return f"No {type_obj.get_measurement_type_display()} measurements recorded yet."
-    
-    type_display = measurement.get_measurement_type_display()
+    ).order_by('-date_recorded')[:3])
+
+    if not recent:
+        return f"No {_MEASUREMENT_TYPE_LABELS[measurement_type]} measurements recorded yet."
+
+    measurement = recent[0]
+    type_display = _MEASUREMENT_TYPE_LABELS[measurement_type]
     result = f"Latest {type_display}: {measurement.value} (recorded on {measurement.date_recorded.strftime('%Y-%m-%d')})"
     
     if measurement.notes:
         result += f"\nNote: {measurement.notes}"
     
-    # Check if there are previous measurements to show trend
-    previous = UserMeasurement.objects.filter(
-        user=user,
-        measurement_type=measurement_type,
-        date_recorded__lt=measurement.date_recorded
-    ).order_by('-date_recorded').first()
-    
+    # Check if there are previous measurements to show trend. Same-date
+    # rows aren't a "previous" measurement - only a strictly earlier
+    # date counts, matching the old date_recorded__lt query.
+    previous = next(
+        (m for m in recent[1:] if m.date_recorded < measurement.date_recorded),
+        None
+    )
+
     if previous:
         change = measurement.value - previous.value
         days_diff = (measurement.date_recorded - previous.date_recorded).days
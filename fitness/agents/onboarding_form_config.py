@@ -2,6 +2,61 @@
 Fitness Onboarding Form Configuration
 Defines the user onboarding flow for fitness profiles
 """
+import logging
+from functools import lru_cache
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Answer choices and validators are shared across every onboarding run,
+# so they live at module scope instead of being rebuilt per question
+# dict. Tuples (not sets) keep the option order stable in the LLM
+# extraction prompt.
+_FITNESS_LEVELS = ('inactive', 'light', 'moderate', 'active', 'very_active')
+_LOCATIONS = ('home', 'gym', 'both')
+
+
+def _is_0_to_7(x):
+    return x.isdigit() and 0 <= int(x) <= 7
+
+
+def _non_empty(x):
+    return len(x.strip()) > 0
+
+
+def _no_exercise_days_needed(answers):
+    return int(answers.get('exercises_per_week', 0)) == 0
+
+
+def _no_run_days_needed(answers):
+    return int(answers.get('runs_per_week', 0)) == 0
+
+
+@lru_cache(maxsize=1)
+def _all_equipment_pks():
+    """
+    Equipment is static reference data and .set() only needs PKs, so the
+    catalogue id list is cached after the first onboarding submission.
+    """
+    from fitness.models import Equipment
+    return tuple(Equipment.objects.values_list('id', flat=True))
+
+
+@lru_cache(maxsize=1)
+def _bodyweight_pk_cached():
+    from fitness.models import Equipment
+    return Equipment.objects.filter(name__iexact='body weight').values_list('id', flat=True).first()
+
+
+def _bodyweight_pk():
+    pk = _bodyweight_pk_cached()
+    if pk is None:
+        # Don't pin a miss: the catalogue may simply not be imported
+        # yet, and a permanently cached None would skip equipment
+        # assignment for every home onboarding until restart
+        _bodyweight_pk_cached.cache_clear()
+    return pk
 
 
 def save_fitness_profile(data, user, conversation):
@@ -17,8 +72,8 @@ def save_fitness_profile(data, user, conversation):
         (success: bool, message: str)
     """
     try:
-        from fitness.models import UserFitnessProfile, Equipment
-        
+        from fitness.models import UserFitnessProfile
+
         # Parse exercise and run days
         exercise_days = []
         if data.get('exercise_days'):
@@ -27,38 +82,40 @@ def save_fitness_profile(data, user, conversation):
         run_days = []
         if data.get('run_days'):
             run_days = [day.strip() for day in data['run_days'].split(',')]
-        
-        # Create profile
-        profile = UserFitnessProfile.objects.create(
-            user=user,
-            fitness_level=data.get('fitness_level', 'inactive'),
-            exercises_per_week=int(data.get('exercises_per_week', 0)),
-            runs_per_week=int(data.get('runs_per_week', 0)),
-            exercise_days=exercise_days,
-            run_days=run_days,
-            exercise_location=data.get('exercise_location', 'home'),
-            injuries=data.get('injuries', ''),
-            restrictions=data.get('restrictions', ''),
-        )
-        
-        # Auto-assign equipment based on location
-        location = data.get('exercise_location', 'home')
-        if location == 'gym':
-            # Assign all gym equipment
-            gym_equipment = Equipment.objects.all()
-            profile.available_equipment.set(gym_equipment)
-        elif location == 'home':
-            # Assign only bodyweight
-            bodyweight = Equipment.objects.filter(name__iexact='body weight').first()
-            if bodyweight:
-                profile.available_equipment.set([bodyweight])
-        elif location == 'both':
-            # Assign all equipment
-            all_equipment = Equipment.objects.all()
-            profile.available_equipment.set(all_equipment)
-        
-        profile.save()
-        
+
+        # atomic sits inside the try (not as a decorator around it):
+        # catching an exception inside an atomic block would otherwise
+        # let the block exit cleanly and commit a half-written profile
+        with transaction.atomic():
+            # Create profile
+            profile = UserFitnessProfile.objects.create(
+                user=user,
+                fitness_level=data.get('fitness_level', 'inactive'),
+                exercises_per_week=int(data.get('exercises_per_week', 0)),
+                runs_per_week=int(data.get('runs_per_week', 0)),
+                exercise_days=exercise_days,
+                run_days=run_days,
+                exercise_location=data.get('exercise_location', 'home'),
+                injuries=data.get('injuries', ''),
+                restrictions=data.get('restrictions', ''),
+            )
+
+            # Auto-assign equipment based on location (cached PK lists -
+            # no query after the first submission)
+            location = data.get('exercise_location', 'home')
+            if location in ('gym', 'both'):
+                # Gym access = all equipment available
+                profile.available_equipment.set(_all_equipment_pks())
+            elif location == 'home':
+                # Assign only bodyweight
+                bodyweight_pk = _bodyweight_pk()
+                if bodyweight_pk:
+                    profile.available_equipment.set([bodyweight_pk])
+
+            # No profile.save() here: objects.create() already inserted
+            # the row and no scalar field changes afterwards - the M2M
+            # .set() persists on its own.
+
         return True, f"""✅ **Your fitness profile is complete!**
 
 I'm now your fitness coach ready to help you with your fitness journey.
@@ -72,8 +129,9 @@ You can ask me to:
 What would you like to work on first?"""
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        # The atomic block above has already rolled back the created
+        # profile row, so a retry never sees an orphaned half-profile
+        logger.exception("save_fitness_profile failed for user %s", user.id)
         return False, f"Failed to save profile: {str(e)}"
 
 
@@ -84,60 +142,62 @@ ONBOARDING_FORM = {
 
 I'm your AI fitness coach. To get started, I need to learn a bit about you and your fitness routine.""",
     'completion_message': None,  # Will be set by callback
-    'completion_callback': 'fitness.agents.onboarding_form_config.save_fitness_profile',
+    # Direct function reference: the config is loaded from this module,
+    # never serialized, so there is nothing to resolve on completion
+    'completion_callback': save_fitness_profile,
     'questions': [
         {
             'key': 'fitness_level',
             'question': 'How would you describe your current fitness level? (inactive, lightly active, moderately active, active, or very active)',
-            'valid_values': ['inactive', 'light', 'moderate', 'active', 'very_active'],
+            'valid_values': _FITNESS_LEVELS,
             'error_msg': 'Please choose one: inactive, lightly active, moderately active, active, or very active.'
         },
         {
             'key': 'exercises_per_week',
             'question': 'How many structured exercise sessions would you like to do per week?',
-            'validator': lambda x: x.isdigit() and 0 <= int(x) <= 7,
-            'parser': lambda x: int(x),
+            'validator': _is_0_to_7,
+            'parser': int,
             'error_msg': 'Please enter a number between 0 and 7.'
         },
         {
             'key': 'runs_per_week',
             'question': 'How many running sessions would you like to do per week?',
-            'validator': lambda x: x.isdigit() and 0 <= int(x) <= 7,
-            'parser': lambda x: int(x),
+            'validator': _is_0_to_7,
+            'parser': int,
             'error_msg': 'Please enter a number between 0 and 7.'
         },
         {
             'key': 'exercise_days',
             'question': 'Which days would you like to exercise? (e.g., Monday, Wednesday, Friday)',
-            'validator': lambda x: len(x.strip()) > 0,
+            'validator': _non_empty,
             'error_msg': 'Please tell me which days you want to exercise.',
-            'skip_if': lambda answers: int(answers.get('exercises_per_week', 0)) == 0,
+            'skip_if': _no_exercise_days_needed,
             'default_value': ''
         },
         {
             'key': 'run_days',
             'question': 'Which days would you like to run?',
-            'validator': lambda x: len(x.strip()) > 0,
+            'validator': _non_empty,
             'error_msg': 'Please tell me which days you want to run.',
-            'skip_if': lambda answers: int(answers.get('runs_per_week', 0)) == 0,
+            'skip_if': _no_run_days_needed,
             'default_value': ''
         },
         {
             'key': 'exercise_location',
             'question': 'Where do you prefer to exercise? (home, gym, or both)',
-            'valid_values': ['home', 'gym', 'both'],
+            'valid_values': _LOCATIONS,
             'error_msg': 'Please choose: home, gym, or both.'
         },
         {
             'key': 'injuries',
             'question': 'Do you have any injuries I should know about? (Say "none" if you don\'t have any)',
-            'validator': lambda x: len(x.strip()) > 0,
+            'validator': _non_empty,
             'error_msg': 'Please let me know about any injuries, or say "none".'
         },
         {
             'key': 'restrictions',
             'question': 'Do you have any physical restrictions or limitations? (Say "none" if you don\'t have any)',
-            'validator': lambda x: len(x.strip()) > 0,
+            'validator': _non_empty,
             'error_msg': 'Please let me know about any restrictions, or say "none".'
         },
     ]
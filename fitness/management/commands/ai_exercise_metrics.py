@@ -1,57 +1,139 @@
+import asyncio
 import os
 import json
 import re
 import time
+from functools import lru_cache
+import httpx
 from django.core.management.base import BaseCommand
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIChatModel
 from pydantic_ai.providers.ollama import OllamaProvider
-from fitness.models import Exercise
+from django.db.models import Prefetch
+from fitness.models import Equipment, Exercise
+
+
+# Fallback-heuristic keyword sets. Tokenizing the text once and
+# intersecting frozensets is O(|text|) rather than one substring scan
+# per keyword per flag; the regexes are compiled once at import.
+_TOKEN_RE = re.compile(r"[a-z/]+")
+_JSON_RE = re.compile(r"(\{.*\})", re.S)
+
+REPS_KW = frozenset({"rep", "reps", "repetition", "repetitions", "sets", "curl", "press", "squat", "deadlift", "row"})
+WEIGHT_KW = frozenset({"kg", "g", "lb", "lbs", "weight", "dumbbell", "barbell", "kettlebell", "plate", "plates", "machine", "smith", "olympic"})
+DURATION_KW = frozenset({"hold", "sec", "second", "seconds", "minute", "minutes", "duration", "timed", "plank", "tabata", "interval"})
+DISTANCE_KW = frozenset({"km", "miles", "mile", "distance", "meter", "metre", "run", "cycle", "bike", "swim", "rower"})
+PACE_KW = frozenset({"pace", "speed", "mph", "kph", "km/h", "min/km", "min/mile"})
+
+WEIGHT_EQUIP_RE = re.compile(r"\b(dumbbell|barbell|kettlebell|plate|plates|machine|smith|olympic)\b")
+
+
+# Shared pooled HTTP client, mirroring agents.services.llm_service:
+# without it each request can pay TCP setup instead of reusing
+# keep-alive connections to the Ollama server.
+_HTTP_CLIENT = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=16, max_connections=16),
+    timeout=httpx.Timeout(300.0, connect=5.0),
+)
+
+SYSTEM_PROMPT = (
+    "You are an exercise tracking classifier.\n"
+    "Given an exercise name, description and step-by-step instructions, decide which of the following metrics the exercise should track: "
+    "tracks_reps, tracks_weight, tracks_duration, tracks_distance, tracks_pace.\n"
+    "Return ONLY a single JSON object with these five keys and boolean values. NO additional text.\n"
+    "Be conservative when unsure, but if the exercise name or equipment indicates bars/dumbbells/kettlebells/plates/machines, prefer `tracks_weight`: true.\n"
+    "Examples (exact JSON only):\n"
+    "{\"tracks_reps\": true, \"tracks_weight\": true, \"tracks_duration\": false, \"tracks_distance\": false, \"tracks_pace\": false}\n"
+    "{\"tracks_reps\": false, \"tracks_weight\": false, \"tracks_duration\": true, \"tracks_distance\": false, \"tracks_pace\": false}\n"
+    "{\"tracks_reps\": false, \"tracks_weight\": false, \"tracks_duration\": false, \"tracks_distance\": true, \"tracks_pace\": true}\n"
+)
+
+
+@lru_cache(maxsize=1)
+def _get_agent():
+    """Build the classifier agent once; repeated invocations in the same
+    process reuse the provider and its connection pool."""
+    ollama_model = OpenAIChatModel(
+        model_name="llama3.2:latest",
+        provider=OllamaProvider(base_url=os.environ.get("OLLAMA_BASE_URL"), http_client=_HTTP_CLIENT),
+    )
+    return Agent(ollama_model, system_prompt=SYSTEM_PROMPT)
 
 
 class Command(BaseCommand):
     help = 'Analyze exercises and set tracking flags (reps, weight, duration, distance, pace) using an AI agent.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Number of concurrent AI requests (default 8)')
+
     def handle(self, *args, **options):
-        # Configure model/provider (uses OLLAMA_BASE_URL env variable if present)
-        ollama_model = OpenAIChatModel(
-            model_name="llama3.2:latest",
-            provider=OllamaProvider(base_url=os.environ.get("OLLAMA_BASE_URL")),
+        # Cached model/provider (uses OLLAMA_BASE_URL env variable if present)
+        agent = _get_agent()
+
+        start_ts = time.time()
+
+        # Materialize exercises and their equipment names while still in a
+        # sync context - the coroutines below must not touch the ORM.
+        # Prefetching the equipment M2M turns the per-exercise name
+        # lookup into two queries total instead of N+1, and .only()
+        # leaves the multi-KB embedding vector out of every row read.
+        qs = Exercise.objects.only(
+            'id', 'name', 'description', 'instructions',
+            'tracks_reps', 'tracks_weight', 'tracks_duration', 'tracks_distance', 'tracks_pace',
+        ).prefetch_related(
+            Prefetch('equipment_required', queryset=Equipment.objects.only('name'))
         )
+        jobs = [
+            (ex, [e.name for e in ex.equipment_required.all()])
+            for ex in qs
+        ]
+        total = len(jobs)
+        print(f'🔎 Found {total} exercises to analyze')
 
-        agent = Agent(
-            ollama_model,
-            system_prompt=(
-                "You are an exercise tracking classifier.\n"
-                "Given an exercise name, description and step-by-step instructions, decide which of the following metrics the exercise should track: "
-                "tracks_reps, tracks_weight, tracks_duration, tracks_distance, tracks_pace.\n"
-                "Return ONLY a single JSON object with these five keys and boolean values. NO additional text.\n"
-                "Be conservative when unsure, but if the exercise name or equipment indicates bars/dumbbells/kettlebells/plates/machines, prefer `tracks_weight`: true.\n"
-                "Examples (exact JSON only):\n"
-                "{\"tracks_reps\": true, \"tracks_weight\": true, \"tracks_duration\": false, \"tracks_distance\": false, \"tracks_pace\": false}\n"
-                "{\"tracks_reps\": false, \"tracks_weight\": false, \"tracks_duration\": true, \"tracks_distance\": false, \"tracks_pace\": false}\n"
-                "{\"tracks_reps\": false, \"tracks_weight\": false, \"tracks_duration\": false, \"tracks_distance\": true, \"tracks_pace\": true}\n"
-            ),
+        # The classification loop is I/O bound on the LLM server, which
+        # handles concurrent requests; fan the calls out with a bounded
+        # semaphore instead of paying N x latency serially.
+        results = asyncio.run(self._classify_all(agent, jobs, options['concurrency']))
+
+        changed_exercises = []
+        for ex, final in results:
+            if final is None:
+                continue
+
+            changed = False
+            for k, v in final.items():
+                if getattr(ex, k) != v:
+                    setattr(ex, k, v)
+                    changed = True
+
+            if changed:
+                changed_exercises.append(ex)
+                print(f'✅ Updated: {ex.name} -> {final}')
+
+        # One batched UPDATE for the five flag columns instead of a
+        # full-row save per changed exercise
+        Exercise.objects.bulk_update(
+            changed_exercises,
+            fields=['tracks_reps', 'tracks_weight', 'tracks_duration', 'tracks_distance', 'tracks_pace'],
+            batch_size=500,
         )
 
-        qs = Exercise.objects.all()
-        total = qs.count()
-        print(f'🔎 Found {total} exercises to analyze')
+        elapsed = time.time() - start_ts
+        print(f'✨ Done. Updated {len(changed_exercises)} exercise(s) out of {total} in {elapsed:.2f}s.')
 
-        updated = 0
+    async def _classify_all(self, agent, jobs, concurrency):
+        """Run one classification coroutine per exercise, at most
+        `concurrency` in flight at a time."""
+        sem = asyncio.Semaphore(concurrency)
 
-        for idx, ex in enumerate(qs.iterator(), start=1):
-            start_ts = time.time()
-            print(f'\n[{idx}/{total}] Processing: {ex.name} (id={ex.id})')
-            # Build analyzed text
+        async def _classify(idx, ex, equipment_names):
             instructions = ex.instructions
             if isinstance(instructions, list):
                 instructions_text = "\n".join([str(x) for x in instructions])
             else:
                 instructions_text = str(instructions or "")
 
-            # Gather equipment and simple heuristics to guide the agent and post-processing
-            equipment_names = list(ex.equipment_required.values_list('name', flat=True)) if hasattr(ex, 'equipment_required') else []
             equip_text = ", ".join(equipment_names)
 
             prompt = (
@@ -63,51 +145,43 @@ class Command(BaseCommand):
             )
 
             try:
-                # Show prompt summary length for debugging
-                print(f'   Prompt length: {len(prompt)} chars')
-                resp = agent.run_sync(prompt)
+                async with sem:
+                    print(f'[{idx}/{len(jobs)}] Processing: {ex.name} (id={ex.id})')
+                    resp = await agent.run(prompt)
                 out = (resp.output or "").strip()
-                out_preview = out if len(out) < 800 else out[:800] + '...'
-                print('   AI raw output (truncated):', out_preview)
 
                 # Try to parse JSON directly; if it fails, extract JSON substring
                 parsed = None
                 try:
                     parsed = json.loads(out)
                 except Exception:
-                    m = re.search(r"(\{.*\})", out, re.S)
+                    m = _JSON_RE.search(out)
                     if m:
                         try:
                             parsed = json.loads(m.group(1))
                         except Exception:
                             parsed = None
 
+                equip_lower = " ".join((n or "").lower() for n in equipment_names)
+
                 # Fallback heuristic if AI output isn't parseable
                 if not isinstance(parsed, dict):
                     text = f"{ex.name} {ex.description} {instructions_text} {equip_text}".lower()
+                    tokens = set(_TOKEN_RE.findall(text))
                     parsed = {
-                        "tracks_reps": any(w in text for w in ["rep", "reps", "repetition", "repetitions", "sets", "curl", "press", "squat", "deadlift", "row"]),
-                        "tracks_weight": any(w in text for w in ["kg", "g", "lb", "lbs", "weight", "dumbbell", "barbell", "kettlebell", "plate", "plates", "machine", "smith", "olympic"]) or any(k in (n or "").lower() for n in equipment_names for k in ["dumbbell", "barbell", "kettlebell", "plate", "machine", "smith", "olympic"]),
-                        "tracks_duration": any(w in text for w in ["hold", "sec", "second", "seconds", "minute", "minutes", "duration", "timed", "plank", "tabata", "interval"]),
-                        "tracks_distance": any(w in text for w in ["km", "miles", "mile", "distance", "meter", "metre", "run", "cycle", "bike", "swim", "rower"]),
-                        "tracks_pace": any(w in text for w in ["pace", "speed", "mph", "kph", "km/h", "min/km", "min/mile"]) or ("run" in text and any(w in text for w in ["pace", "speed"])),
+                        "tracks_reps": bool(tokens & REPS_KW),
+                        "tracks_weight": bool(tokens & WEIGHT_KW) or bool(WEIGHT_EQUIP_RE.search(equip_lower)),
+                        "tracks_duration": bool(tokens & DURATION_KW),
+                        "tracks_distance": bool(tokens & DISTANCE_KW),
+                        "tracks_pace": bool(tokens & PACE_KW),
                     }
 
                 # If equipment clearly indicates weights, prefer tracks_weight True
-                weight_equipment_keywords = ["dumbbell", "barbell", "kettlebell", "plate", "plates", "machine", "smith", "olympic"]
-                equipment_has_weight = any(k in (n or "").lower() for n in equipment_names for k in weight_equipment_keywords)
-                name_has_weight = any(k in ex.name.lower() for k in weight_equipment_keywords)
-                cable_in_equipment = any("cable" in (n or "").lower() for n in equipment_names)
+                equipment_has_weight = bool(WEIGHT_EQUIP_RE.search(equip_lower))
+                name_has_weight = bool(WEIGHT_EQUIP_RE.search(ex.name.lower()))
+                cable_in_equipment = "cable" in equip_lower
                 if equipment_has_weight or name_has_weight or cable_in_equipment:
-                    parsed = parsed if isinstance(parsed, dict) else {}
                     parsed['tracks_weight'] = True
-                    if cable_in_equipment:
-                        print('   Enforced: tracks_weight=True due to cable equipment')
-                    else:
-                        print('   Heuristic: forced tracks_weight=True due to equipment/name')
-
-                # Show parsed JSON for debugging
-                print('   Parsed JSON:', json.dumps(parsed))
 
                 # Ensure booleans
                 final = {
@@ -117,29 +191,12 @@ class Command(BaseCommand):
                     'tracks_distance': bool(parsed.get('tracks_distance')),
                     'tracks_pace': bool(parsed.get('tracks_pace')),
                 }
-
-                changed = False
-                for k, v in final.items():
-                    if getattr(ex, k) != v:
-                        setattr(ex, k, v)
-                        changed = True
-
-                if changed:
-                    ex.save()
-                    updated += 1
-                    elapsed = time.time() - start_ts
-                    msg = f'✅ Updated: {ex.name} -> {final} (elapsed: {elapsed:.2f}s)'
-                    print(msg)
-                else:
-                    elapsed = time.time() - start_ts
-                    msg = f'— Skipped (no change): {ex.name}  Elapsed: {elapsed:.2f}s'
-                    print(msg)
+                return ex, final
 
             except Exception as e:
-                # Dump some debugging info on error
                 print(f'❌ Error processing {ex.name}: {e}')
-                try:
-                    print(f'   Prompt was: {prompt[:1000]}')
-                except Exception:
-                    pass
-        print(f'✨ Done. Updated {updated} exercise(s) out of {total}.')
+                return ex, None
+
+        return await asyncio.gather(
+            *(_classify(idx, ex, names) for idx, (ex, names) in enumerate(jobs, start=1))
+        )
@@ -1,5 +1,8 @@
+import asyncio
 import os
 import time
+from functools import lru_cache
+import httpx
 from django.core.management.base import BaseCommand
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIChatModel
@@ -7,48 +10,100 @@ from pydantic_ai.providers.ollama import OllamaProvider
 from fitness.models import Exercise
 
 
+# Shared pooled HTTP client, mirroring agents.services.llm_service:
+# without it each request can pay TCP setup instead of reusing
+# keep-alive connections to the Ollama server.
+_HTTP_CLIENT = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=16, max_connections=16),
+    timeout=httpx.Timeout(300.0, connect=5.0),
+)
+
+
+SYSTEM_PROMPT = (
+    "You are a helpful content generator that converts exercise data into a concise, user-facing description.\n"
+    "Input will include name, equipment, target muscles/body areas and step-by-step instructions.\n"
+    "Produce 1–2 short sentences (20–50 words) describing the exercise for an end user.\n"
+    "do not explain how to do the exercise; focus on what it is and which muscles it targets, if it needs equipment.\n"
+    "Return ONLY the description text. Do not add labels, JSON, or commentary. Keep it factual and concise."
+)
+
+
+@lru_cache(maxsize=1)
+def _get_agent():
+    """Build the description agent once; repeated invocations in the same
+    process reuse the provider and its connection pool."""
+    ollama_model = OpenAIChatModel(
+        model_name=os.environ.get('AI_MODEL_NAME', 'llama3.2:latest'),
+        provider=OllamaProvider(base_url=os.environ.get('OLLAMA_BASE_URL'), http_client=_HTTP_CLIENT),
+    )
+    return Agent(ollama_model, system_prompt=SYSTEM_PROMPT)
+
+
 class Command(BaseCommand):
     help = 'Generate user-facing exercise descriptions using an AI agent (overwrites existing descriptions).'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Number of concurrent AI requests (default 8)')
+
     def handle(self, *args, **options):
-        # Configure model/provider
-        ollama_model = OpenAIChatModel(
-            model_name=os.environ.get('AI_MODEL_NAME', 'llama3.2:latest'),
-            provider=OllamaProvider(base_url=os.environ.get('OLLAMA_BASE_URL')),
-        )
+        # Cached model/provider (uses AI_MODEL_NAME/OLLAMA_BASE_URL env
+        # variables if present)
+        agent = _get_agent()
 
-        agent = Agent(
-            ollama_model,
-            system_prompt=(
-                "You are a helpful content generator that converts exercise data into a concise, user-facing description.\n"
-                "Input will include name, equipment, target muscles/body areas and step-by-step instructions.\n"
-                "Produce 1–2 short sentences (20–50 words) describing the exercise for an end user.\n"
-                "do not explain how to do the exercise; focus on what it is and which muscles it targets, if it needs equipment.\n"
-                "Return ONLY the description text. Do not add labels, JSON, or commentary. Keep it factual and concise."
-            ),
-        )
+        start_ts = time.time()
 
-        qs = Exercise.objects.all().order_by('id')
-        total = qs.count()
+        # build_embedding_text() walks M2M relations, so resolve the
+        # context while still in a sync ORM context; the coroutines below
+        # only talk to the LLM.
+        # queryset_for_embedding() prefetches those relations (four
+        # queries total instead of three per row) and .defer() keeps the
+        # multi-KB embedding vector out of rows this command never reads
+        jobs = [
+            (ex, ex.build_embedding_text())
+            for ex in Exercise.queryset_for_embedding().defer('embedding').order_by('id')
+        ]
+        total = len(jobs)
         print(f'🔎 Found {total} exercises to generate descriptions for')
 
-        updated = 0
+        # Description generation is I/O bound on the LLM server; fan the
+        # calls out with a bounded semaphore instead of N x latency serially.
+        results = asyncio.run(self._generate_all(agent, jobs, options['concurrency']))
+
+        changed_exercises = []
         errors = 0
+        for ex, desc in results:
+            if desc is None:
+                errors += 1
+                continue
 
-        for idx, ex in enumerate(qs.iterator(), start=1):
-            start_ts = time.time()
-            try:
-                # Build deterministic context from exercise fields
-                context = ex.build_embedding_text()
+            # Collect changed descriptions for one batched UPDATE
+            if ex.description != desc:
+                ex.description = desc
+                changed_exercises.append(ex)
+                print(f'   ✅ Saved: {desc[:120]}')
+
+        Exercise.objects.bulk_update(changed_exercises, fields=['description'], batch_size=500)
+
+        elapsed = time.time() - start_ts
+        print(f'✨ Done. Updated {len(changed_exercises)} descriptions, {errors} errors in {elapsed:.2f}s.')
 
-                prompt = (
-                    f"Exercise name: {ex.name}\n"
-                    f"Context: {context}\n\n"
-                    "Write a short (1-2 sentence) user-facing description for this exercise."
-                )
+    async def _generate_all(self, agent, jobs, concurrency):
+        """Run one description coroutine per exercise, at most
+        `concurrency` in flight at a time."""
+        sem = asyncio.Semaphore(concurrency)
 
-                print(f'[{idx}/{total}] Generating description for: {ex.name} (id={ex.id})')
-                resp = agent.run_sync(prompt)
+        async def _generate(idx, ex, context):
+            prompt = (
+                f"Exercise name: {ex.name}\n"
+                f"Context: {context}\n\n"
+                "Write a short (1-2 sentence) user-facing description for this exercise."
+            )
+
+            try:
+                async with sem:
+                    print(f'[{idx}/{len(jobs)}] Generating description for: {ex.name} (id={ex.id})')
+                    resp = await agent.run(prompt)
                 desc = (resp.output or '').strip()
                 # sanitize single-line and trim
                 desc = ' '.join(desc.split())
@@ -57,21 +112,13 @@ class Command(BaseCommand):
 
                 if not desc:
                     print(f'   ⚠️ AI returned empty description for {ex.name}; skipping')
-                    errors += 1
-                    continue
-
-                # Save description if changed
-                if ex.description != desc:
-                    ex.description = desc
-                    ex.save(update_fields=['description'])
-                    elapsed = time.time() - start_ts
-                    print(f'   ✅ Saved ({elapsed:.2f}s): {desc[:120]}')
-                    updated += 1
-                else:
-                    print('   — No change')
+                    return ex, None
+                return ex, desc
 
             except Exception as e:
-                errors += 1
                 print(f'   ❌ Error for {ex.name}: {e}')
+                return ex, None
 
-        print(f'✨ Done. Updated {updated} descriptions, {errors} errors.')
+        return await asyncio.gather(
+            *(_generate(idx, ex, context) for idx, (ex, context) in enumerate(jobs, start=1))
+        )
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from django.utils import timezone
 from fitness.models import Exercise
 from agents.services.embedding_service import EmbeddingService
@@ -10,14 +11,28 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--model', type=str, default='nomic-embed-text:v1.5', help='Embedding model to use')
         parser.add_argument('--limit', type=int, default=0, help='Limit to first N exercises (0 = all)')
+        parser.add_argument('--batch-size', type=int, default=64, help='Texts per embedding request (default 64)')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-embed every exercise, including ones already embedded with this model')
 
     def handle(self, *args, **options):
         model = options.get('model')
         limit = options.get('limit')
+        batch_size = options.get('batch_size')
 
         svc = EmbeddingService()
 
-        qs = Exercise.objects.all().order_by('id')
+        # The stored vector is only written, never read - defer it so each
+        # row load skips the multi-KB embedding column.
+        # queryset_for_embedding() prefetches the M2M relations that
+        # build_embedding_text reads, avoiding three queries per row.
+        qs = Exercise.queryset_for_embedding().defer('embedding').order_by('id')
+        if not options.get('force'):
+            # Push the staleness check into SQL: only rows with no
+            # embedding, or one from a different model, are re-embedded.
+            # The embedding calls dominate this command's runtime, so
+            # reruns become near no-ops.
+            qs = qs.filter(Q(embedding__isnull=True) | ~Q(embedding_model=model))
         total = qs.count()
         if limit and limit > 0:
             qs = qs[:limit]
@@ -27,28 +42,53 @@ class Command(BaseCommand):
 
         generated = 0
         errors = 0
+        batch = []
 
         for idx, ex in enumerate(qs, start=1):
-            try:
-                text = ex.build_embedding_text()
-                if not text.strip():
-                    print(f'[{idx}/{total}] Skipping {ex.name} (empty text)')
-                    continue
+            text = ex.build_embedding_text()
+            if not text.strip():
+                print(f'[{idx}/{total}] Skipping {ex.name} (empty text)')
+                continue
 
-                print(f'[{idx}/{total}] Generating embedding for: {ex.name} (id={ex.id})')
-                emb = svc.generate_embedding(text=text, model=model)
+            print(f'[{idx}/{total}] Queued: {ex.name} (id={ex.id})')
+            batch.append((ex, text))
 
-                # store embedding and metadata
-                ex.embedding = emb
-                ex.embedding_model = model
-                ex.embedding_generated_at = timezone.now()
-                ex.save(update_fields=['embedding', 'embedding_model', 'embedding_generated_at'])
+            # Embed in batches: one HTTP round-trip per batch and one
+            # amortized forward pass, instead of per-row calls
+            if len(batch) >= batch_size:
+                ok, failed = self._flush(svc, batch, model)
+                generated += ok
+                errors += failed
+                batch = []
 
-                generated += 1
-                print(f'   ✅ Saved embedding for {ex.name} (len={len(emb)})')
-
-            except Exception as e:
-                errors += 1
-                print(f'   ❌ Error embedding {ex.name}: {e}')
+        if batch:
+            ok, failed = self._flush(svc, batch, model)
+            generated += ok
+            errors += failed
 
         print(f'✨ Done. Generated {generated} embeddings, {errors} errors')
+
+    def _flush(self, svc, batch, model):
+        """Embed one batch with a single request and persist the vectors
+        with a single bulk_update. Returns (generated, errors)."""
+        try:
+            vectors = svc.generate_embeddings([text for _, text in batch], model=model)
+        except Exception as e:
+            print(f'   ❌ Error embedding batch of {len(batch)}: {e}')
+            return 0, len(batch)
+
+        now = timezone.now()
+        exercises = []
+        for (ex, _), emb in zip(batch, vectors):
+            ex.embedding = emb
+            ex.embedding_model = model
+            ex.embedding_generated_at = now
+            exercises.append(ex)
+
+        Exercise.objects.bulk_update(
+            exercises,
+            fields=['embedding', 'embedding_model', 'embedding_generated_at'],
+            batch_size=64,
+        )
+        print(f'   ✅ Saved {len(exercises)} embedding(s)')
+        return len(exercises), 0
@@ -1,8 +1,10 @@
 from django.core.management.base import BaseCommand
 from fitness.models import BodyPart, BodyArea, Equipment, Exercise
+import ijson
 import json
 import os
 from django.conf import settings
+from django.db import transaction
 
 DATA_DIR = os.path.join(settings.BASE_DIR, 'fitness', 'exercise_data')
 
@@ -16,6 +18,9 @@ class Command(BaseCommand):
         self.import_exercises()
         self.stdout.write(self.style.SUCCESS('All fitness data imported successfully.'))
 
+    # One transaction per importer pass: a single commit/fsync instead
+    # of one per statement, and a failed pass rolls back cleanly.
+    @transaction.atomic
     def import_bodyareas(self):
         path = os.path.join(DATA_DIR, 'bodyareas.json')
         with open(path) as f:
@@ -25,6 +30,7 @@ class Command(BaseCommand):
             if created:
                 self.stdout.write(f'Created BodyArea: {obj.name}')
 
+    @transaction.atomic
     def import_bodyparts(self):
         path = os.path.join(DATA_DIR, 'bodyparts.json')
         with open(path) as f:
@@ -34,6 +40,7 @@ class Command(BaseCommand):
             if created:
                 self.stdout.write(f'Created BodyPart: {obj.name}')
 
+    @transaction.atomic
     def import_equipment(self):
         path = os.path.join(DATA_DIR, 'equipments.json')
         with open(path) as f:
@@ -43,37 +50,89 @@ class Command(BaseCommand):
             if created:
                 self.stdout.write(f'Created Equipment: {obj.name}')
 
+    @transaction.atomic
     def import_exercises(self):
         path = os.path.join(DATA_DIR, 'exercises.json')
-        with open(path) as f:
-            data = json.load(f)
-        for entry in data:
-            name = entry.get('name')
-            description = entry.get('description', '')
-            instructions = entry.get('instructions', [])
-            exercise, created = Exercise.objects.get_or_create(
-                name=name,
-                defaults={
-                    'description': description,
-                    'instructions': instructions,
-                    'is_custom': False
-                }
-            )
+
+        # Resolve relation names in memory: one SELECT per reference table
+        # instead of one query per name per exercise. The through rows
+        # accept raw PKs, so no model instances are needed either.
+        bp_map = dict(BodyPart.objects.values_list('name', 'id'))
+        ba_map = dict(BodyArea.objects.values_list('name', 'id'))
+        eq_map = dict(Equipment.objects.values_list('name', 'id'))
+        existing = set(Exercise.objects.values_list('name', flat=True))
+
+        # Stream the file with ijson instead of json.load: only one batch
+        # of entries is resident at a time, so peak memory stays flat no
+        # matter how large the dataset grows.
+        batch = []
+        with open(path, 'rb') as f:
+            for entry in ijson.items(f, 'item'):
+                batch.append(entry)
+                if len(batch) >= 500:
+                    self._flush_exercises(batch, existing, bp_map, ba_map, eq_map)
+                    batch = []
+        if batch:
+            self._flush_exercises(batch, existing, bp_map, ba_map, eq_map)
+
+    def _flush_exercises(self, batch, existing, bp_map, ba_map, eq_map):
+        # Bulk-insert the missing exercises instead of a get_or_create
+        # (SELECT + INSERT) round-trip per entry.
+        # is_bodyweight_only is set here from the entry's equipment list:
+        # the through-row bulk_create below fires no m2m signals, so the
+        # receiver that normally maintains the flag never runs for
+        # imported rows.
+        new_exercises = []
+        for entry in batch:
+            if entry.get('name') in existing:
+                continue
+            eq_names = [e.strip().lower() for e in entry.get('equipments', []) if e in eq_map]
+            new_exercises.append(Exercise(
+                name=entry.get('name'),
+                description=entry.get('description', ''),
+                instructions=entry.get('instructions', []),
+                is_custom=False,
+                is_bodyweight_only=(
+                    not eq_names or (len(eq_names) == 1 and eq_names[0] == 'body weight')
+                ),
+            ))
+        Exercise.objects.bulk_create(new_exercises, batch_size=500, ignore_conflicts=True)
+        for exercise in new_exercises:
+            existing.add(exercise.name)
+            self.stdout.write(f'Created Exercise: {exercise.name}')
+
+        # Attach relations straight through the M2M through models
+        # (ignore_conflicts on a bulk_create doesn't return PKs, so map
+        # the batch names back to ids with one SELECT). The through
+        # tables carry a unique constraint on (exercise, related), so
+        # ignore_conflicts makes reruns no-ops.
+        names = [entry.get('name') for entry in batch if entry.get('name')]
+        ex_map = dict(Exercise.objects.filter(name__in=names).values_list('name', 'id'))
+        bp_through = Exercise.target_body_parts.through
+        ba_through = Exercise.body_areas.through
+        eq_through = Exercise.equipment_required.through
+
+        bp_rows, ba_rows, eq_rows = [], [], []
+        for entry in batch:
+            ex_id = ex_map.get(entry.get('name'))
+            if ex_id is None:
+                continue
             # Map targetMuscles to BodyParts (target_body_parts)
-            for muscle in entry.get('targetMuscles', []):
-                bp = BodyPart.objects.filter(name=muscle).first()
-                if bp:
-                    exercise.target_body_parts.add(bp)
+            bp_rows.extend(
+                bp_through(exercise_id=ex_id, bodypart_id=bp_map[m])
+                for m in entry.get('targetMuscles', []) if m in bp_map
+            )
             # Map bodyParts to BodyAreas (body_areas)
-            for area in entry.get('bodyParts', []):
-                ba = BodyArea.objects.filter(name=area).first()
-                if ba:
-                    exercise.body_areas.add(ba)
+            ba_rows.extend(
+                ba_through(exercise_id=ex_id, bodyarea_id=ba_map[a])
+                for a in entry.get('bodyParts', []) if a in ba_map
+            )
             # Map equipment (fix: use 'equipments' key from dataset)
-            for eq in entry.get('equipments', []):
-                eq_obj = Equipment.objects.filter(name=eq).first()
-                if eq_obj:
-                    exercise.equipment_required.add(eq_obj)
-            exercise.save()
-            if created:
-                self.stdout.write(f'Created Exercise: {exercise.name}')
+            eq_rows.extend(
+                eq_through(exercise_id=ex_id, equipment_id=eq_map[e])
+                for e in entry.get('equipments', []) if e in eq_map
+            )
+
+        bp_through.objects.bulk_create(bp_rows, batch_size=500, ignore_conflicts=True)
+        ba_through.objects.bulk_create(ba_rows, batch_size=500, ignore_conflicts=True)
+        eq_through.objects.bulk_create(eq_rows, batch_size=500, ignore_conflicts=True)
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0005_usermeasurement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usermeasurement',
+            index=models.Index(fields=['user', 'measurement_type', '-date_recorded'], name='fitness_usermeas_latest_idx'),
+        ),
+    ]
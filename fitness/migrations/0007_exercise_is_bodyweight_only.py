@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+def backfill_is_bodyweight_only(apps, schema_editor):
+    Exercise = apps.get_model('fitness', 'Exercise')
+    changed = []
+    for exercise in Exercise.objects.prefetch_related('equipment_required').only('id'):
+        names = [e.name.strip().lower() for e in exercise.equipment_required.all()]
+        if not names or (len(names) == 1 and names[0] == 'body weight'):
+            exercise.is_bodyweight_only = True
+            changed.append(exercise)
+    Exercise.objects.bulk_update(changed, ['is_bodyweight_only'], batch_size=500)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0006_usermeasurement_latest_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='is_bodyweight_only',
+            field=models.BooleanField(
+                default=False,
+                db_index=True,
+                help_text="Denormalized: no equipment needed (or only 'body weight'). "
+                          "Maintained by an m2m_changed signal on equipment_required.",
+            ),
+        ),
+        migrations.RunPython(backfill_is_bodyweight_only, noop),
+    ]
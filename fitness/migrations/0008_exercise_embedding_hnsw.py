@@ -0,0 +1,22 @@
+import pgvector.django
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0007_exercise_is_bodyweight_only'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exercise',
+            index=pgvector.django.HnswIndex(
+                name='exercise_emb_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+        ),
+    ]
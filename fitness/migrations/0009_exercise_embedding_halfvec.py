@@ -0,0 +1,50 @@
+import pgvector.django
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0008_exercise_embedding_hnsw'),
+    ]
+
+    operations = [
+        # The HNSW index is typed on the column's opclass, so it has to
+        # be rebuilt around the type change
+        migrations.RemoveIndex(
+            model_name='exercise',
+            name='exercise_emb_hnsw',
+        ),
+        migrations.RunSQL(
+            sql=(
+                "ALTER TABLE fitness_exercise ALTER COLUMN embedding "
+                "TYPE halfvec(768) USING embedding::halfvec(768)"
+            ),
+            reverse_sql=(
+                "ALTER TABLE fitness_exercise ALTER COLUMN embedding "
+                "TYPE vector(768) USING embedding::vector(768)"
+            ),
+            state_operations=[
+                migrations.AlterField(
+                    model_name='exercise',
+                    name='embedding',
+                    field=pgvector.django.HalfVectorField(
+                        dimensions=768,
+                        null=True,
+                        blank=True,
+                        help_text="Semantic embedding for the exercise (pgvector halfvec)",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=pgvector.django.HnswIndex(
+                name='exercise_emb_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['halfvec_cosine_ops'],
+            ),
+        ),
+    ]
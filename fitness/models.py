@@ -1,8 +1,11 @@
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
+from functools import cached_property
 from datetime import date
 from django.utils import timezone
-from pgvector.django import VectorField
+from pgvector.django import HalfVectorField, HnswIndex
 
 
 class BodyPart(models.Model):
@@ -23,6 +26,16 @@ class Equipment(models.Model):
     def __str__(self):
         return self.name
 
+# All 32 combinations of the five tracks_* flags, indexed by bitmask
+# (reps=1, weight=2, duration=4, distance=8, pace=16). Shared across
+# instances so tracking_metrics is a single tuple lookup.
+_TRACKING_FLAGS = ('reps', 'weight', 'duration', 'distance', 'pace')
+_TRACKING_METRICS = tuple(
+    tuple(name for bit, name in enumerate(_TRACKING_FLAGS) if mask >> bit & 1)
+    for mask in range(32)
+)
+
+
 class Exercise(models.Model):
     # Comprehensive exercise database combining ExerciseDB dataset 
     # with custom tracking capabilities for fitness coaching.
@@ -70,6 +83,12 @@ class Exercise(models.Model):
         blank=True,
         help_text="Equipment needed for this exercise"
     )
+    is_bodyweight_only = models.BooleanField(
+        default=False,
+        db_index=True,
+        help_text="Denormalized: no equipment needed (or only 'body weight'). "
+                  "Maintained by an m2m_changed signal on equipment_required."
+    )
     
     # === TRACKING METRICS (Boolean Flags) ===
     tracks_reps = models.BooleanField(
@@ -94,11 +113,13 @@ class Exercise(models.Model):
     )
 
     # === EMBEDDING FOR SEMANTIC SEARCH ===
-    embedding = VectorField(
+    # Stored as halfvec (FP16): half the bytes per row and per index
+    # probe, with negligible recall loss for sentence embeddings
+    embedding = HalfVectorField(
         dimensions=768,
         null=True,
         blank=True,
-        help_text="Semantic embedding for the exercise (pgvector)"
+        help_text="Semantic embedding for the exercise (pgvector halfvec)"
     )
 
     embedding_model = models.CharField(
@@ -136,6 +157,15 @@ class Exercise(models.Model):
         ordering = ['name']
         indexes = [
             models.Index(fields=['name']),
+            # ANN index so CosineDistance ordering probes the graph
+            # instead of scanning every 768-dim vector
+            HnswIndex(
+                name='exercise_emb_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['halfvec_cosine_ops'],
+            ),
         ]
         verbose_name = 'Exercise'
         verbose_name_plural = 'Exercises'
@@ -143,80 +173,126 @@ class Exercise(models.Model):
     def __str__(self):
         return self.name
     
+    @cached_property
+    def tracking_metrics(self):
+        #Tuple of metrics this exercise can track, computed once per
+        #instance: serializers that read it per ExerciseSet pay the five
+        #flag reads only on the first access.
+        mask = (
+            self.tracks_reps
+            | self.tracks_weight << 1
+            | self.tracks_duration << 2
+            | self.tracks_distance << 3
+            | self.tracks_pace << 4
+        )
+        return _TRACKING_METRICS[mask]
+
     def get_tracking_metrics(self):
         #Returns list of metrics this exercise can track.
-        #Only includes metrics for fields that exist on the model.
-
-        metrics = []
-        if self.tracks_reps:
-            metrics.append('reps')
-        if self.tracks_weight:
-            metrics.append('weight')
-        if self.tracks_duration:
-            metrics.append('duration')
-        if self.tracks_distance:
-            metrics.append('distance')
-        if self.tracks_pace:
-            metrics.append('pace')
-        return metrics
+        return list(self.tracking_metrics)
     
-    def is_equipment_free(self):
-        #Check if exercise requires no equipment.
+    def _compute_is_bodyweight_only(self):
         # Treat an exercise as equipment-free when it has no related equipment
         # OR when the only equipment is 'body weight' (case-insensitive).
+        # Reading through .all() hits the prefetch cache when callers
+        # prefetched equipment_required.
+        names = [e.name.strip().lower() for e in self.equipment_required.all()]
+        return not names or (len(names) == 1 and names[0] == 'body weight')
+
+    def is_equipment_free(self):
+        #Check if exercise requires no equipment.
+        # Thin accessor over the denormalized flag: querying
+        # Exercise.objects.filter(is_bodyweight_only=True) is an index
+        # seek instead of an M2M probe per exercise.
+        return self.is_bodyweight_only
+
+    @classmethod
+    def queryset_for_embedding(cls):
+        """Queryset for callers that run build_embedding_text over many rows.
 
-        qs = self.equipment_required.all()
-        if not qs.exists():
-            return True
-        names = list(qs.values_list('name', flat=True))
-        # consider equipment-free only when the sole entry is 'body weight'
-        return len(names) == 1 and names[0].strip().lower() == 'body weight'
+        Prefetches the three M2M relations the text is built from, so a
+        batch job issues four queries total instead of three per exercise.
+        """
+        return cls.objects.prefetch_related(
+            models.Prefetch('equipment_required', queryset=Equipment.objects.only('name')),
+            models.Prefetch('target_body_parts', queryset=BodyPart.objects.only('name')),
+            models.Prefetch('body_areas', queryset=BodyArea.objects.only('name')),
+        )
 
     def build_embedding_text(self) -> str:
         """Build a deterministic text blob representing this exercise for embedding.
 
         Combines name, description, instructions, equipment and body part/area names.
+        Batch callers should load rows via queryset_for_embedding(): the relation
+        reads below go through .all(), which hits the prefetch cache
+        (values_list would re-query per instance).
         """
-        parts = []
-        parts.append(self.name or "")
-        if self.description:
-            parts.append(self.description)
-
         # instructions may be stored as list or string
         instr = self.instructions or []
         if isinstance(instr, list):
-            parts.append("\n".join([str(x) for x in instr if x]))
+            instructions_text = "\n".join(str(x).strip() for x in instr if x)
+        else:
+            instructions_text = str(instr).strip()
+
+        # Single join over pre-stripped pieces; filter(None, ...) drops
+        # the empty ones, and the trailing 'exercise' tag plus fixed
+        # ordering keep the blob deterministic
+        return "\n\n".join(filter(None, (
+            (self.name or "").strip(),
+            self.description.strip() if self.description else "",
+            instructions_text,
+            ", ".join(e.name for e in self.equipment_required.all()),
+            ", ".join(bp.name for bp in self.target_body_parts.all()),
+            ", ".join(a.name for a in self.body_areas.all()),
+            "exercise",
+        )))
+
+def clear_equipment_caches():
+    """Drop the per-process Equipment PK caches.
+
+    Equipment is near-static reference data, so several modules hold its
+    PKs in lru_cache; call this whenever the catalogue changes so those
+    caches repopulate on next use instead of serving stale rows until
+    restart. Imported lazily to avoid a models <-> agents import cycle.
+    """
+    from fitness.agents import fitness_agent, onboarding_form_config
+    fitness_agent._all_equipment_ids.cache_clear()
+    onboarding_form_config._all_equipment_pks.cache_clear()
+    onboarding_form_config._bodyweight_pk_cached.cache_clear()
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def _equipment_catalogue_changed(sender, **kwargs):
+    clear_equipment_caches()
+
+
+@receiver(m2m_changed, sender=Exercise.equipment_required.through)
+def _sync_is_bodyweight_only(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Exercise.is_bodyweight_only in step with equipment_required."""
+    if reverse and action == 'pre_clear':
+        # pk_set is None for clear(), so grab the affected exercise ids
+        # while the through rows still exist
+        instance._bodyweight_sync_pks = list(instance.exercises.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Changed from the Equipment side: pk_set holds the exercise ids
+        # except on post_clear, where the pre_clear capture supplies them
+        if action == 'post_clear':
+            pks = instance.__dict__.pop('_bodyweight_sync_pks', [])
         else:
-            parts.append(str(instr))
-
-        # equipment
-        try:
-            equipments = list(self.equipment_required.values_list('name', flat=True))
-        except Exception:
-            equipments = []
-        if equipments:
-            parts.append(", ".join(equipments))
-
-        # target body parts and body areas
-        try:
-            tbp = list(self.target_body_parts.values_list('name', flat=True))
-        except Exception:
-            tbp = []
-        if tbp:
-            parts.append(", ".join(tbp))
-
-        try:
-            areas = list(self.body_areas.values_list('name', flat=True))
-        except Exception:
-            areas = []
-        if areas:
-            parts.append(", ".join(areas))
-
-        # final canonical tag
-        parts.append("exercise")
-
-        # join with clear separators to keep deterministic ordering
-        return "\n\n".join([p.strip() for p in parts if p is not None and str(p).strip() != ""])
+            pks = pk_set or []
+        exercises = Exercise.objects.filter(pk__in=pks)
+    else:
+        exercises = [instance]
+    for exercise in exercises:
+        flag = exercise._compute_is_bodyweight_only()
+        if exercise.is_bodyweight_only != flag:
+            exercise.is_bodyweight_only = flag
+            exercise.save(update_fields=['is_bodyweight_only'])
+
 
 class UserFitnessProfile(models.Model):
 
@@ -291,6 +367,14 @@ class WorkoutPlan(models.Model):
     def __str__(self):
         return f"{self.name} ({self.user.username})"
 
+class WorkoutManager(models.Manager):
+    """Default manager joining the FKs __str__ and serializers read,
+    so listing N workouts is one query instead of 1 + 2N."""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('user', 'workout_plan')
+
+
 class Workout(models.Model):
     STATUS_CHOICES = [  
         ('scheduled', 'Scheduled'),
@@ -305,9 +389,25 @@ class Workout(models.Model):
     feedback = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = WorkoutManager()
+
     def __str__(self):
         return f"Workout {self.id} for {self.user.username} on {self.date}"
 
+class ExerciseSetManager(models.Manager):
+    """Default manager joining exercise and workout (read by __str__ and
+    workout serialization); the exercise embedding vector is deferred so
+    the join doesn't drag a multi-KB column along. Related managers
+    (workout.exercise_sets) inherit this queryset."""
+
+    def get_queryset(self):
+        return (
+            super().get_queryset()
+            .select_related('exercise', 'workout')
+            .defer('exercise__embedding')
+        )
+
+
 class ExerciseSet(models.Model):
     STATUS_CHOICES = [
         ('scheduled', 'Scheduled'),
@@ -327,6 +427,8 @@ class ExerciseSet(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
     user_feedback = models.TextField(blank=True, null=True)
 
+    objects = ExerciseSetManager()
+
     class Meta:
         ordering = ['order']
 
@@ -391,6 +493,15 @@ class UserMeasurement(models.Model):
 
     class Meta:
         ordering = ['-date_recorded']
+        indexes = [
+            # Supports the latest-measurement lookup: (user, type) filter
+            # with ORDER BY date_recorded DESC LIMIT n becomes a single
+            # index seek instead of a filter + sort
+            models.Index(
+                fields=['user', 'measurement_type', '-date_recorded'],
+                name='fitness_usermeas_latest_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.measurement_type} on {self.date_recorded}: {self.value}"
\ No newline at end of file
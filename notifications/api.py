@@ -1,4 +1,5 @@
 from ninja import Router, Schema
+from django.db import transaction
 from django.http import JsonResponse
 from notifications.models import Device
 
@@ -14,9 +15,9 @@ def register_device(request, payload: DeviceTokenSchema):
     if not token:
         return JsonResponse({"error": "Token is required"}, status=400)
 
-    # Remove any old devices with the same token
-    Device.objects.filter(token=token).delete()
-
-    # Create a new device for the authenticated user
-    Device.objects.create(user=request.user, token=token)
+    # Single atomic upsert on the unique token column instead of a
+    # DELETE + INSERT pair (two round-trips and a window where the
+    # token had no device row at all)
+    with transaction.atomic():
+        Device.objects.update_or_create(token=token, defaults={'user': request.user})
     return JsonResponse({"success": "Device registered successfully"})
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""Lazy Firebase Admin SDK initialization"""
+from functools import lru_cache
+
+from django.conf import settings
+
+
+@lru_cache(maxsize=1)
+def get_firebase_app():
+    """
+    Initialize the Firebase app on first use.
+    Initializing at settings import made every Django process - each
+    management command and Q worker fork - pay the service-account JSON
+    parse and RSA key setup, whether or not it ever sends a push.
+    firebase_admin itself is imported here (not at module scope) so that
+    merely importing this module doesn't drag in grpc/protobuf.
+    """
+    import firebase_admin
+    from firebase_admin import credentials
+
+    cred = credentials.Certificate(settings.FIREBASE_ADMIN_SDK_JSON)
+    return firebase_admin.initialize_app(cred)
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from notifications.models import Device
 from django.contrib.auth import get_user_model
 
@@ -17,8 +18,10 @@ class Command(BaseCommand):
 
         try:
             user = User.objects.get(username=username)
-            Device.objects.filter(token=token).delete()  # Remove any existing devices with the same token
-            Device.objects.create(user=user, token=token)
+            # Single atomic upsert on the unique token column instead of
+            # a DELETE + INSERT pair
+            with transaction.atomic():
+                Device.objects.update_or_create(token=token, defaults={'user': user})
             self.stdout.write(self.style.SUCCESS(f'Device token registered for user {username}'))
         except User.DoesNotExist:
             self.stdout.write(self.style.ERROR(f'User {username} does not exist'))
\ No newline at end of file
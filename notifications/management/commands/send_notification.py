@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from firebase_admin import messaging
+from notifications.firebase_client import get_firebase_app
 from notifications.models import Device
 from django.contrib.auth import get_user_model
 
@@ -32,24 +33,42 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR('Please specify either a user or a group'))
 
     def send_notification_to_user(self, user, title, body):
-        devices = Device.objects.filter(user=user)
-        registration_tokens = [device.token for device in devices]
+        get_firebase_app()
+        # Only the token column is needed - skip materializing Device
+        # instances for a throwaway list
+        registration_tokens = list(Device.objects.filter(user=user).values_list('token', flat=True))
 
         if not registration_tokens:
             self.stdout.write(self.style.WARNING(f'No devices found for user {user.username}'))
             return
 
-        for token in registration_tokens:
-            message = messaging.Message(
-                notification=messaging.Notification(
-                    title=title,
-                    body=body,
-                ),
-                token=token,
-            )
+        # One multicast request covers up to 500 tokens, instead of one
+        # HTTPS round-trip per device
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(
+                title=title,
+                body=body,
+            ),
+            tokens=registration_tokens,
+        )
 
-            try:
-                response = messaging.send(message)
-                self.stdout.write(self.style.SUCCESS(f'Message sent to {token}: {response}'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error sending notification to {token}: {e}'))
\ No newline at end of file
+        try:
+            batch = messaging.send_each_for_multicast(message)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error sending notification to {user.username}: {e}'))
+            return
+
+        dead_tokens = []
+        for token, resp in zip(registration_tokens, batch.responses):
+            if resp.success:
+                self.stdout.write(self.style.SUCCESS(f'Message sent to {token}: {resp.message_id}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'Error sending notification to {token}: {resp.exception}'))
+                if isinstance(resp.exception, messaging.UnregisteredError):
+                    dead_tokens.append(token)
+
+        # Drop tokens FCM reports as no longer registered so future sends
+        # don't keep paying for dead devices
+        if dead_tokens:
+            Device.objects.filter(token__in=dead_tokens).delete()
+            self.stdout.write(self.style.WARNING(f'Removed {len(dead_tokens)} unregistered device(s)'))
\ No newline at end of file
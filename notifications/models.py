@@ -8,5 +8,12 @@ class Device(models.Model):
     token = models.CharField(max_length=255, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Covers the per-user token fetch in the notification send
+            # paths as an index-only scan
+            models.Index(fields=['user', 'token'], name='notif_device_user_token_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s Device"
@@ -1,31 +1,81 @@
 from notifications.models import Device
+from notifications.firebase_client import get_firebase_app
 from django.contrib.auth import get_user_model
-from firebase_admin import messaging
 
 User = get_user_model()
 
 def send_notification_task(args):
-    username, title, body = args
-    try:
-        user = User.objects.get(username=username)
-    except User.DoesNotExist:
-        return f"User {username} does not exist"
+    # The first element is a user id (int) from the bulk orchestrator,
+    # which already resolved the User rows - or a username (str) for
+    # manual dispatches, resolved here with one lookup.
+    user_ref, title, body = args
 
-    devices = Device.objects.filter(user=user)
-    registration_tokens = [device.token for device in devices]
-    if not registration_tokens:
-        return f"No devices found for user {username}"
-
-    for token in registration_tokens:
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=title,
-                body=body,
-            ),
-            token=token,
-        )
+    # Imported here so processes that never send a push (management
+    # commands, backup workers) don't load the multi-MB Firebase SDK
+    from firebase_admin import messaging
+
+    get_firebase_app()
+    if isinstance(user_ref, int):
+        user_id = user_ref
+        username = f"user {user_ref}"
+    else:
         try:
-            messaging.send(message)
-        except Exception as e:
-            return f"Error sending notification to {token}: {e}"
+            user_id = User.objects.values_list('id', flat=True).get(username=user_ref)
+        except User.DoesNotExist:
+            return f"User {user_ref} does not exist"
+        username = user_ref
+
+    # Only the token column is needed - skip materializing Device
+    # instances for a throwaway list
+    registration_tokens = list(Device.objects.filter(user_id=user_id).values_list('token', flat=True))
+    if not registration_tokens:
+        return f"No devices found for {username}"
+
+    # One multicast request covers up to 500 tokens, instead of one
+    # HTTPS round-trip per device
+    message = messaging.MulticastMessage(
+        notification=messaging.Notification(
+            title=title,
+            body=body,
+        ),
+        tokens=registration_tokens,
+    )
+    try:
+        batch = messaging.send_each_for_multicast(message)
+    except Exception as e:
+        return f"Error sending notification to {username}: {e}"
+
+    # Drop tokens FCM reports as no longer registered so future sends
+    # don't keep paying for dead devices
+    dead_tokens = [
+        token
+        for token, resp in zip(registration_tokens, batch.responses)
+        if not resp.success and isinstance(resp.exception, messaging.UnregisteredError)
+    ]
+    if dead_tokens:
+        Device.objects.filter(token__in=dead_tokens).delete()
+
+    if batch.failure_count:
+        return f"Notification sent to {username} ({batch.success_count} ok, {batch.failure_count} failed)"
     return f"Notification sent to {username}"
+
+
+def send_notifications_bulk(usernames, title, body):
+    """Fan a campaign out across the Q cluster: one task per recipient,
+    so the network-bound FCM sends run on workers concurrently instead
+    of serially in the caller. Each task issues a single multicast
+    request covering all of that user's devices.
+
+    Usernames are resolved to ids with one SELECT here, so the workers
+    skip the per-recipient User lookup entirely."""
+    from django_q.tasks import async_task
+
+    user_ids = dict(
+        User.objects.filter(username__in=usernames).values_list('username', 'id')
+    )
+    for username in usernames:
+        user_id = user_ids.get(username)
+        if user_id is None:
+            continue
+        async_task('notifications.tasks.send_notification_task', (user_id, title, body))
+    return len(user_ids)